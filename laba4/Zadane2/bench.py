@@ -0,0 +1,90 @@
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from order_module import Заказ, КомпактныйЗаказ
+
+
+def bench_totals(count=100000):
+    # Сборка заказа по одному товару и удаление всех товаров с начала
+    заказ = Заказ()
+    start = time.perf_counter()
+    for i in range(count):
+        заказ.добавить_товар(f"Товар {i % 100}", 0.1 + i % 7)
+    added = time.perf_counter() - start
+    start = time.perf_counter()
+    while заказ.товары:
+        заказ.удалить_товар(len(заказ.товары) - 1)
+    removed = time.perf_counter() - start
+    print(f"Добавление: {count / added:12.0f} товаров/с")
+    print(f"Удаление:   {count / removed:12.0f} товаров/с, остаток итога {заказ.общая_стоимость!r}")
+
+
+def bench_memory(count=100000):
+    # Байт на заказ (tracemalloc) для обычного, компактного и компактного с общими товарами
+    rng = random.Random(3)
+    names = ["Пицца", "Кола", "Бургер", "Чай", "Вода", "Салат"]
+    rows = [[(rng.choice(names), rng.randint(30, 40) * 10) for _ in range(rng.randint(1, 3))]
+            for _ in range(count)]
+    rows = json.loads(json.dumps(rows))  # отдельные объекты строк, как после разбора файла
+    variants = (("Заказ", lambda товары: Заказ(товары)),
+                ("КомпактныйЗаказ", lambda товары: КомпактныйЗаказ(товары)),
+                ("КомпактныйЗаказ, общие товары", lambda товары: КомпактныйЗаказ(товары, общий=True)))
+    for name, create in variants:
+        tracemalloc.start()
+        orders = [create(товары) for товары in rows]
+        used, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name:>30}: {used / count:7.0f} байт/заказ")
+        del orders
+
+
+def bench_multiset(lines=100000):
+    # Сложение и вычитание заказов по lines товаров; половина товаров второго заказа есть в первом
+    rng = random.Random(4)
+    первый = Заказ([(f"Товар {rng.randrange(lines)}", rng.randint(1, 5) * 100) for _ in range(lines)])
+    второй = Заказ([(т.наименование, т.цена) for т in первый.товары[::2]] +
+                   [(f"Новый {i}", 100) for i in range(lines // 2)])
+    start = time.perf_counter()
+    сумма = первый + второй
+    merged = time.perf_counter() - start
+    start = time.perf_counter()
+    разность = первый - второй
+    diffed = time.perf_counter() - start
+    print(f"Сложение:  {merged * 1000:8.1f} мс, товаров {len(сумма.товары)}")
+    print(f"Вычитание: {diffed * 1000:8.1f} мс, товаров {len(разность.товары)}")
+
+
+def bench_receipts(count=1000000):
+    # Потоковый импорт count чеков из текстового файла через Заказ.iter_from_text
+    rng = random.Random(5)
+    names = ["Пицца", "Кола", "Бургер (двойной)", "Чай", "Вода", "Салат"]
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "receipts.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            for _ in range(count):
+                заказ = Заказ([(rng.choice(names), rng.randint(30, 900)) for _ in range(rng.randint(1, 3))])
+                f.write(f"{заказ}\n\n")
+        size = os.path.getsize(path)
+        start = time.perf_counter()
+        with open(path, "r", encoding="utf-8") as f:
+            total = sum(1 for _ in Заказ.iter_from_text(f))
+        elapsed = time.perf_counter() - start
+    print(f"Импорт: {total} чеков за {elapsed:.2f} с, {total / elapsed:.0f} чеков/с, {size / elapsed / 2 ** 20:.1f} МБ/с")
+
+
+BENCHMARKS = {
+    "totals": bench_totals,
+    "memory": bench_memory,
+    "multiset": bench_multiset,
+    "receipts": bench_receipts,
+}
+
+if __name__ == "__main__":
+    # Использование: python bench.py <замер> [параметры...]
+    name = sys.argv[1] if len(sys.argv) > 1 else "totals"
+    BENCHMARKS[name](*(int(a) for a in sys.argv[2:]))
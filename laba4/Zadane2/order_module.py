@@ -1,6 +1,29 @@
 from abc import ABC, abstractmethod
 import json
-from datetime import datetime
+import math
+import re
+import sys
+from collections import Counter
+from datetime import datetime, timedelta
+
+# Шаг компенсированного суммирования (Ноймайер): поправка накапливает младшие разряды,
+# потерянные при сложении, точная сумма = сумма + поправка
+def _сложить_с_поправкой(сумма, поправка, значение):
+    s = сумма + значение
+    if abs(сумма) >= abs(значение):
+        поправка += (сумма - s) + значение
+    else:
+        поправка += (значение - s) + сумма
+    return s, поправка
+
+# Строки чека в формате Заказ.__str__. Наименование жадное, поэтому скобки внутри него
+# не мешают: цена берётся из последних " (... руб.)" в строке.
+_ЧИСЛО = r"[-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?"
+_ЧЕК_ЗАГОЛОВОК = re.compile(r"Заказ от (\d{4}-\d{2}-\d{2} \d{2}:\d{2}(?::\d{2})?)")
+_ЧЕК_СТАТУС = re.compile(r"Статус: (.+)")
+_ЧЕК_ТОВАР = re.compile(rf"- (.*) \(({_ЧИСЛО}) руб\.\)")
+_ЧЕК_ИТОГ = re.compile(rf"Общая стоимость: {_ЧИСЛО} руб\.")
+_ЧЕК_СКИДКА = re.compile(rf"Скидка: {_ЧИСЛО}%")
 
 # Класс для композиции: Товар
 class Товар:
@@ -19,8 +42,19 @@ class Товар:
     def __str__(self):
         return f"{self.__наименование} ({self.__цена} руб.)"
 
+    # Товары равны по значению, что позволяет считать их в Counter (мультимножество)
+    def __eq__(self, other):
+        if isinstance(other, Товар):
+            return self.__наименование == other.наименование and self.__цена == other.цена
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.__наименование, self.__цена))
+
 # Абстрактный базовый класс
 class OrderEntity(ABC):
+    __slots__ = ()  # иначе у наследников с __slots__ остаётся __dict__
+
     @abstractmethod
     def рассчитать_стоимость(self):
         pass
@@ -30,6 +64,7 @@ class Заказ(OrderEntity):
     def __init__(self, товары=None, статус="в обработке"):
         self.__товары = [] if товары is None else [Товар(t[0], t[1]) for t in товары]
         self.__статус = статус
+        self.__поправка = 0.0
         self.__общая_стоимость = self.__обновить_стоимость()
         self.__дата_создания = datetime.now()
 
@@ -40,7 +75,7 @@ class Заказ(OrderEntity):
 
     @property
     def общая_стоимость(self):
-        return self.__общая_стоимость
+        return self.__общая_стоимость + self.__поправка
 
     @property
     def статус(self):
@@ -59,51 +94,116 @@ class Заказ(OrderEntity):
     # Специальные методы
     def __str__(self):
         товары_список = "\n".join(f"- {т}" for т in self.__товары)
-        return f"Заказ от {self.__дата_создания.strftime('%Y-%m-%d %H:%M')}\nСтатус: {self.__статус}\nТовары:\n{товары_список}\nОбщая стоимость: {self.__общая_стоимость} руб."
+        return f"Заказ от {self.__дата_создания.strftime('%Y-%m-%d %H:%M')}\nСтатус: {self.__статус}\nТовары:\n{товары_список}\nОбщая стоимость: {self.общая_стоимость} руб."
 
     def __eq__(self, other):
         if isinstance(other, Заказ):
             return self.__товары == other.товары and self.__статус == other.статус
         return False
 
+    # Сложение и вычитание как над мультимножествами товаров, за O(n + m).
+    # Товары неизменяемы, поэтому новый заказ разделяет их с исходными.
     def __add__(self, other):
         if not isinstance(other, Заказ):
             raise ValueError("Can only add another Order")
-        new_товары = self.__товары + other.товары
-        return Заказ([(т.наименование, т.цена) for т in new_товары], self.__статус)
+        return Заказ.__из_товаров(self.__товары + other.товары, self.__статус)
 
     def __sub__(self, other):
+        # Каждый товар other вычитается не больше одного раза: [a, a, b] - [a] = [a, b]
         if not isinstance(other, Заказ):
             raise ValueError("Can only subtract another Order")
-        new_товары = [т for т in self.__товары if т not in other.товары]
-        return Заказ([(т.наименование, т.цена) for т in new_товары], self.__статус)
+        остаток = Counter(other.товары)
+        new_товары = []
+        for т in self.__товары:
+            if остаток[т]:
+                остаток[т] -= 1
+            else:
+                new_товары.append(т)
+        return Заказ.__из_товаров(new_товары, self.__статус)
+
+    @staticmethod
+    def __из_товаров(товары, статус):
+        заказ = Заказ(None, статус)
+        заказ.__товары = товары
+        заказ.__обновить_стоимость()
+        return заказ
 
     # Метод класса
     @classmethod
     def from_string(cls, str_value):
-        lines = str_value.strip().split("\n")
-        товары = []
-        for line in lines[2:-1]:  # Пропускаем заголовок и стоимость
-            name, price = line.split(" (")[0][2:], float(line.split("(")[1].split(" руб.)")[0])
-            товары.append((name, price))
-        return cls(товары, lines[1].split(": ")[1])
+        заказы = list(cls.iter_from_text(str_value.strip().splitlines()))
+        if len(заказы) != 1:
+            raise ValueError(f"Ожидался один чек, найдено {len(заказы)}")
+        return заказы[0]
+
+    # Потоковый разбор чеков из файла (или любого итератора строк) за один проход.
+    # Чеки разделяются пустыми строками; строка "Товары:" и строка скидки необязательны.
+    # У заказа без товаров __str__ печатает пустую строку сразу после "Товары:" — она допустима.
+    # Итоговая стоимость пересчитывается по товарам.
+    @classmethod
+    def iter_from_text(cls, file):
+        состояние = "заголовок"
+        номер = 0
+        for номер, строка in enumerate(file, 1):
+            строка = строка.rstrip("\r\n")
+            if состояние == "товары":
+                совпадение = _ЧЕК_ТОВАР.fullmatch(строка)
+                if совпадение:
+                    товары.append((совпадение[1], float(совпадение[2])))
+                    пустой_список = False
+                elif строка == "Товары:" and not товары:
+                    пустой_список = True
+                elif not строка and пустой_список:
+                    пустой_список = False
+                elif _ЧЕК_ИТОГ.fullmatch(строка):
+                    заказ = cls(товары, статус)
+                    заказ.__дата_создания = дата
+                    yield заказ
+                    состояние = "заголовок"
+                else:
+                    raise ValueError(f"Строка {номер}: ожидался товар или общая стоимость, получено {строка!r}")
+            elif состояние == "заголовок":
+                if not строка.strip() or _ЧЕК_СКИДКА.fullmatch(строка):
+                    continue
+                совпадение = _ЧЕК_ЗАГОЛОВОК.fullmatch(строка)
+                if совпадение is None:
+                    raise ValueError(f"Строка {номер}: ожидался заголовок 'Заказ от ...', получено {строка!r}")
+                дата = datetime.fromisoformat(совпадение[1])
+                состояние = "статус"
+            else:
+                совпадение = _ЧЕК_СТАТУС.fullmatch(строка)
+                if совпадение is None or совпадение[1] not in ["в обработке", "оплачен", "доставлен"]:
+                    raise ValueError(f"Строка {номер}: ожидался допустимый статус, получено {строка!r}")
+                статус = совпадение[1]
+                товары = []
+                пустой_список = False
+                состояние = "товары"
+        if состояние != "заголовок":
+            raise ValueError(f"Строка {номер}: чек не закончен строкой общей стоимости")
 
     # Вспомогательные методы
     def рассчитать_стоимость(self):
         return self.__обновить_стоимость()
 
+    # Полный пересчёт; добавление и удаление товара меняют итог только на цену товара
     def __обновить_стоимость(self):
-        self.__общая_стоимость = sum(т.цена for т in self.__товары)
+        self.__общая_стоимость = math.fsum(т.цена for т in self.__товары)
+        self.__поправка = 0.0
         return self.__общая_стоимость
 
+    def __изменить_стоимость(self, разница):
+        self.__общая_стоимость, self.__поправка = _сложить_с_поправкой(
+            self.__общая_стоимость, self.__поправка, разница)
+
     def добавить_товар(self, наименование, цена):
-        self.__товары.append(Товар(наименование, цена))
-        self.__общая_стоимость = self.__обновить_стоимость()
+        товар = Товар(наименование, цена)
+        self.__товары.append(товар)
+        self.__изменить_стоимость(товар.цена)
 
     def удалить_товар(self, индекс):
         if 0 <= индекс < len(self.__товары):
-            self.__товары.pop(индекс)
-            self.__общая_стоимость = self.__обновить_стоимость()
+            товар = self.__товары.pop(индекс)
+            self.__изменить_стоимость(-товар.цена)
         else:
             raise IndexError("Неверный индекс товара")
 
@@ -113,7 +213,7 @@ class Заказ(OrderEntity):
             "товары": [{"наименование": т.наименование, "цена": т.цена} for т in self.__товары],
             "статус": self.__статус,
             "дата_создания": self.__дата_создания.isoformat(),
-            "общая_стоимость": self.__общая_стоимость
+            "общая_стоимость": self.общая_стоимость
         }
         with open(filename, "w", encoding="utf-8") as f:
             json.dump(data, f, ensure_ascii=False, indent=4)
@@ -125,6 +225,7 @@ class Заказ(OrderEntity):
         self.__статус = data["статус"]
         self.__дата_создания = datetime.fromisoformat(data["дата_создания"])
         self.__общая_стоимость = float(data["общая_стоимость"])
+        self.__поправка = 0.0
 
     # Вызываемый метод
     def __call__(self, наименование, цена):
@@ -146,4 +247,138 @@ class ExtendedOrder(Заказ):
         return base_cost * (1 - self.__скидка / 100)
 
     def __str__(self):
-        return f"{super().__str__()}\nСкидка: {self.__скидка}%"
\ No newline at end of file
+        return f"{super().__str__()}\nСкидка: {self.__скидка}%"
+
+# Компактные варианты: __slots__ вместо __dict__, интернированные наименования и статусы,
+# дата создания — целые микросекунды от эпохи вместо datetime. Публичные свойства те же.
+_ЭПОХА = datetime(1970, 1, 1)
+_МИКРОСЕКУНДА = timedelta(microseconds=1)
+
+
+class КомпактныйТовар:
+    __slots__ = ("__наименование", "__цена")
+
+    # Общие экземпляры для flyweight: (наименование, цена) -> товар
+    _кэш = {}
+
+    def __init__(self, наименование, цена):
+        self.__наименование = sys.intern(наименование)
+        self.__цена = float(цена)
+
+    @classmethod
+    def общий(cls, наименование, цена):
+        # Товар неизменяем, поэтому одинаковые товары могут разделять один объект
+        ключ = (наименование, float(цена))
+        товар = cls._кэш.get(ключ)
+        if товар is None:
+            товар = cls._кэш[ключ] = cls(наименование, цена)
+        return товар
+
+    @property
+    def наименование(self):
+        return self.__наименование
+
+    @property
+    def цена(self):
+        return self.__цена
+
+    def __str__(self):
+        return f"{self.__наименование} ({self.__цена} руб.)"
+
+    def __eq__(self, other):
+        if isinstance(other, КомпактныйТовар):
+            return self.__наименование == other.наименование and self.__цена == other.цена
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self.__наименование, self.__цена))
+
+
+class КомпактныйЗаказ(OrderEntity):
+    __slots__ = ("__товары", "__статус", "__общая_стоимость", "__поправка", "__дата_создания", "__общий")
+
+    # общий=True: товары берутся из flyweight-кэша КомпактныйТовар.общий
+    def __init__(self, товары=None, статус="в обработке", общий=False):
+        self.__общий = общий
+        self.__товары = [] if товары is None else [self.__товар(t[0], t[1]) for t in товары]
+        self.__статус = sys.intern(статус)
+        self.__поправка = 0.0
+        self.__общая_стоимость = math.fsum(т.цена for т in self.__товары)
+        self.__дата_создания = (datetime.now() - _ЭПОХА) // _МИКРОСЕКУНДА
+
+    def __товар(self, наименование, цена):
+        return КомпактныйТовар.общий(наименование, цена) if self.__общий else КомпактныйТовар(наименование, цена)
+
+    @property
+    def товары(self):
+        return self.__товары
+
+    @property
+    def общая_стоимость(self):
+        return self.__общая_стоимость + self.__поправка
+
+    @property
+    def статус(self):
+        return self.__статус
+
+    @статус.setter
+    def статус(self, value):
+        if value not in ["в обработке", "оплачен", "доставлен"]:
+            raise ValueError("Недопустимый статус")
+        self.__статус = sys.intern(value)
+
+    @property
+    def дата_создания(self):
+        return _ЭПОХА + timedelta(microseconds=self.__дата_создания)
+
+    def __str__(self):
+        товары_список = "\n".join(f"- {т}" for т in self.__товары)
+        return f"Заказ от {self.дата_создания.strftime('%Y-%m-%d %H:%M')}\nСтатус: {self.__статус}\nТовары:\n{товары_список}\nОбщая стоимость: {self.общая_стоимость} руб."
+
+    def __eq__(self, other):
+        if isinstance(other, КомпактныйЗаказ):
+            return self.__товары == other.товары and self.__статус == other.статус
+        return False
+
+    def рассчитать_стоимость(self):
+        self.__общая_стоимость = math.fsum(т.цена for т in self.__товары)
+        self.__поправка = 0.0
+        return self.__общая_стоимость
+
+    def добавить_товар(self, наименование, цена):
+        товар = self.__товар(наименование, цена)
+        self.__товары.append(товар)
+        self.__общая_стоимость, self.__поправка = _сложить_с_поправкой(
+            self.__общая_стоимость, self.__поправка, товар.цена)
+
+    def удалить_товар(self, индекс):
+        if 0 <= индекс < len(self.__товары):
+            товар = self.__товары.pop(индекс)
+            self.__общая_стоимость, self.__поправка = _сложить_с_поправкой(
+                self.__общая_стоимость, self.__поправка, -товар.цена)
+        else:
+            raise IndexError("Неверный индекс товара")
+
+    # Тот же формат файла, что у Заказ.save/load
+    def save(self, filename):
+        data = {
+            "товары": [{"наименование": т.наименование, "цена": т.цена} for т in self.__товары],
+            "статус": self.__статус,
+            "дата_создания": self.дата_создания.isoformat(),
+            "общая_стоимость": self.общая_стоимость
+        }
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+
+    def load(self, filename):
+        with open(filename, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.__товары = [self.__товар(t["наименование"], t["цена"]) for t in data["товары"]]
+        self.__статус = sys.intern(data["статус"])
+        self.__дата_создания = (datetime.fromisoformat(data["дата_создания"]) - _ЭПОХА) // _МИКРОСЕКУНДА
+        self.__общая_стоимость = float(data["общая_стоимость"])
+        self.__поправка = 0.0
+
+    def __call__(self, наименование, цена):
+        self.добавить_товар(наименование, цена)
+        return f"Добавлен товар: {наименование} ({цена} руб.)"
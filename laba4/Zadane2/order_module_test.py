@@ -0,0 +1,132 @@
+import io
+import math
+import os
+import tempfile
+import unittest
+
+from order_module import ExtendedOrder, Заказ, КомпактныйЗаказ
+
+
+class TestOrderText(unittest.TestCase):
+    def test_round_trip_through_str(self):
+        """Проверяем, что Заказ.from_string читает то, что печатает __str__"""
+        заказ = Заказ([("Пицца", 500), ("Бургер (двойной)", 350.5)], "оплачен")
+        прочитан = Заказ.from_string(str(заказ))
+        self.assertEqual(прочитан, заказ)
+        self.assertEqual(прочитан.общая_стоимость, 850.5)
+        self.assertEqual(прочитан.дата_создания.replace(second=0, microsecond=0),
+                         заказ.дата_создания.replace(second=0, microsecond=0))
+
+    def test_empty_order_round_trip(self):
+        """Проверяем, что заказ без товаров разбирается обратно"""
+        прочитан = Заказ.from_string(str(Заказ()))
+        self.assertEqual(прочитан.товары, [])
+        self.assertEqual(прочитан.общая_стоимость, 0)
+
+    def test_bulk_dump_with_empty_order(self):
+        """Проверяем поток чеков, в котором есть пустой заказ и заказ со скидкой"""
+        заказы = [Заказ([("Чай (зелёный)", 80)]), Заказ(), ExtendedOrder([("Кола", 100)], скидка=10),
+                  Заказ([("Суп", 250)], "доставлен")]
+        текст = "\n\n".join(str(заказ) for заказ in заказы) + "\n"
+        прочитаны = list(Заказ.iter_from_text(io.StringIO(текст)))
+        self.assertEqual([з.товары for з in прочитаны], [з.товары for з in заказы])
+        self.assertEqual([з.статус for з in прочитаны], [з.статус for з in заказы])
+
+    def test_blank_line_inside_items_is_rejected(self):
+        """Проверяем, что пустая строка между товарами по-прежнему считается ошибкой"""
+        текст = str(Заказ([("Чай", 80), ("Кола", 100)])).replace("- Кола", "\n- Кола")
+        with self.assertRaisesRegex(ValueError, "Строка 5"):
+            Заказ.from_string(текст)
+
+    def test_unfinished_receipt(self):
+        """Проверяем, что чек без строки общей стоимости отвергается"""
+        текст = str(Заказ([("Чай", 80)])).rsplit("\n", 1)[0]
+        with self.assertRaisesRegex(ValueError, "не закончен"):
+            Заказ.from_string(текст)
+
+
+class TestOrderRunningTotal(unittest.TestCase):
+    def test_total_follows_add_and_remove(self):
+        """Проверяем, что нарастающий итог совпадает с точной суммой оставшихся товаров"""
+        for cls in (Заказ, КомпактныйЗаказ):
+            with self.subTest(cls=cls.__name__):
+                заказ = cls([("Дорогой", 1e16)])
+                for i in range(1000):
+                    заказ.добавить_товар(f"Мелочь {i}", 0.1)
+                for _ in range(500):
+                    заказ.удалить_товар(1)
+                self.assertEqual(заказ.общая_стоимость, math.fsum([1e16] + [0.1] * 500))
+                заказ.удалить_товар(0)
+                self.assertAlmostEqual(заказ.общая_стоимость, 50.0, places=9)
+                self.assertEqual(заказ.рассчитать_стоимость(), math.fsum([0.1] * 500))
+                self.assertEqual(заказ.общая_стоимость, math.fsum([0.1] * 500))
+
+    def test_call_adds_to_total(self):
+        """Проверяем, что вызов заказа добавляет товар и его цену"""
+        заказ = Заказ([("Чай", 80)])
+        заказ("Кола", 100.5)
+        self.assertEqual(заказ.общая_стоимость, 180.5)
+        with self.assertRaises(IndexError):
+            заказ.удалить_товар(2)
+        self.assertEqual(заказ.общая_стоимость, 180.5)
+
+    def test_load_replaces_total(self):
+        """Проверяем, что load заменяет итог сохранённым, без накопленной поправки"""
+        with tempfile.TemporaryDirectory() as папка:
+            путь = os.path.join(папка, "order.json")
+            Заказ([("Суп", 250)]).save(путь)
+            for cls in (Заказ, КомпактныйЗаказ):
+                заказ = cls([("Дорогой", 1e16)])
+                заказ.добавить_товар("Мелочь", 0.3)
+                заказ.load(путь)
+                self.assertEqual(заказ.общая_стоимость, 250.0)
+
+    def test_discount(self):
+        """Проверяем, что скидка применяется к пересчитанной стоимости"""
+        заказ = ExtendedOrder([("Кола", 100), ("Чай", 100)], скидка=10)
+        self.assertEqual(заказ.рассчитать_стоимость(), 180.0)
+
+
+class TestOrderMultiset(unittest.TestCase):
+    @staticmethod
+    def названия(заказ):
+        return [т.наименование for т in заказ.товары]
+
+    def test_sub_removes_each_item_once(self):
+        """Проверяем, что каждый товар вычитаемого заказа убирается не больше одного раза"""
+        заказ = Заказ([("Чай", 80), ("Чай", 80), ("Кола", 100), ("Чай", 80)])
+        разность = заказ - Заказ([("Чай", 80), ("Суп", 250)])
+        self.assertEqual(self.названия(разность), ["Чай", "Кола", "Чай"])
+        self.assertEqual(разность.общая_стоимость, 260.0)
+        self.assertEqual(len(заказ.товары), 4)
+
+    def test_sub_compares_name_and_price(self):
+        """Проверяем, что товар с той же ценой, но другим наименованием не вычитается"""
+        разность = Заказ([("Чай", 80), ("Кола", 80)]) - Заказ([("Кола", 90), ("Сок", 80)])
+        self.assertEqual(self.названия(разность), ["Чай", "Кола"])
+
+    def test_add_keeps_order_and_status(self):
+        """Проверяем, что сумма заказов сохраняет порядок товаров и статус левого заказа"""
+        сумма = Заказ([("Чай", 80)], "оплачен") + Заказ([("Кола", 100), ("Чай", 80)])
+        self.assertEqual(self.названия(сумма), ["Чай", "Кола", "Чай"])
+        self.assertEqual(сумма.статус, "оплачен")
+        self.assertEqual(сумма.общая_стоимость, 260.0)
+
+    def test_result_is_independent(self):
+        """Проверяем, что новый заказ не разделяет список товаров с исходными"""
+        левый = Заказ([("Чай", 80)])
+        сумма = левый + Заказ()
+        сумма.добавить_товар("Кола", 100)
+        self.assertEqual(self.названия(левый), ["Чай"])
+        self.assertEqual(левый.общая_стоимость, 80.0)
+
+    def test_other_types_rejected(self):
+        """Проверяем, что складывать и вычитать можно только заказы"""
+        with self.assertRaises(ValueError):
+            Заказ() + 1
+        with self.assertRaises(ValueError):
+            Заказ() - [("Чай", 80)]
+
+
+if __name__ == "__main__":
+    unittest.main()
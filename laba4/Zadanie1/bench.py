@@ -0,0 +1,173 @@
+import csv
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from main import (КЭШ_ПРИБЫЛИ, Банк, БонусныйВклад, ВкладСКапитализацией, КэшПрибыли, Клиент, СрочныйВклад,
+                  установить_кэш_прибыли)
+
+
+def прибыль_циклом(сумма, срок, ставка):
+    # Прежний помесячный расчёт — эталон для сверки
+    итог = сумма
+    месячная = ставка / 100 / 12
+    for _ in range(срок):
+        итог += итог * месячная
+    return round(итог - сумма, 2)
+
+
+def make_book(count, seed=1):
+    rng = random.Random(seed)
+    # Каждая третья сумма — целая: у неё прибыль чаще попадает ровно на половину копейки
+    суммы = [rng.randint(1000, 5000000) + (rng.randint(0, 99) / 100 if i % 3 else 0) for i in range(count)]
+    сроки = [rng.choice((1, 3, 6, 12, 24, 36, 60, 120)) for _ in range(count)]
+    ставки = [rng.choice((4.5, 5, 7.25, 9.9, 12, 16)) for _ in range(count)]
+    return суммы, сроки, ставки
+
+
+def bench_capitalization(count=1000000):
+    # Цикл против замкнутой формы и пакетного расчёта; сверка с точностью до копейки
+    суммы, сроки, ставки = make_book(count)
+    start = time.perf_counter()
+    эталон = [прибыль_циклом(*строка) for строка in zip(суммы, сроки, ставки)]
+    loop = time.perf_counter() - start
+    вклады = [ВкладСКапитализацией(*строка) for строка in zip(суммы, сроки, ставки)]
+    start = time.perf_counter()
+    поштучно = [вклад.рассчитать_прибыль() for вклад in вклады]
+    single = time.perf_counter() - start
+    start = time.perf_counter()
+    пакет = ВкладСКапитализацией.прибыль_пакетом(суммы, сроки, ставки)
+    batch = time.perf_counter() - start
+    print(f"Цикл по месяцам:     {count / loop:12.0f} вкладов/с")
+    print(f"Замкнутая форма:     {count / single:12.0f} вкладов/с")
+    print(f"Пакетный расчёт:     {count / batch:12.0f} вкладов/с")
+    for name, результат in (("замкнутая форма", поштучно), ("пакет", пакет)):
+        расхождения = [abs(a - b) for a, b in zip(эталон, результат) if abs(a - b) > 0.005]
+        print(f"Расхождение с циклом ({name}): {len(расхождения)} вкладов, "
+              f"максимум {max(расхождения, default=0):.2f} руб.")
+
+
+def make_bank(deposits, clients, seed=1):
+    rng = random.Random(seed)
+    банк = Банк()
+    клиенты = [Клиент(f"Клиент {i}") for i in range(clients)]
+    for клиент in клиенты:
+        банк.добавить_клиента(клиент)
+    for сумма, срок, ставка in zip(*make_book(deposits, seed)):
+        тип = rng.choice((СрочныйВклад, БонусныйВклад, ВкладСКапитализацией))
+        rng.choice(клиенты).добавить_вклад(тип(сумма, срок, ставка))
+    return банк, клиенты
+
+
+def сбросить_кэши(клиенты):
+    КЭШ_ПРИБЫЛИ.очистить()
+    for клиент in клиенты:
+        for вклад in клиент.вклады:
+            вклад.сбросить_прибыль()
+
+
+def bench_revalue(deposits=1000000, clients=100000):
+    # Переоценка портфеля: поштучный полиморфный вызов против Банк.переоценить
+    банк, клиенты = make_bank(deposits, clients)
+    start = time.perf_counter()
+    эталон = {клиент.имя: round(math.fsum(в.рассчитать_прибыль() for в in клиент.вклады), 2) for клиент in клиенты}
+    loop = time.perf_counter() - start
+    print(f"Поштучно: {loop:.2f} с, {deposits / loop:.0f} вкладов/с")
+    for процессов in (None, 2, 4):
+        сбросить_кэши(клиенты)
+        start = time.perf_counter()
+        итоги = банк.переоценить(процессов=процессов, размер_части=max(1, deposits // 8))
+        elapsed = time.perf_counter() - start
+        расхождения = sum(1 for имя, прибыль in итоги["клиенты"].items() if abs(прибыль - эталон[имя]) > 0.005)
+        print(f"переоценить(процессов={процессов}): {elapsed:.2f} с, {deposits / elapsed:.0f} вкладов/с, "
+              f"расхождений по клиентам {расхождения} (процессоров: {os.cpu_count()})")
+    print(f"По типам: {итоги['типы']}")
+
+
+def bench_onboarding(rows=1000000, clients=100000):
+    # Массовое открытие вкладов из CSV через Банк.открыть_вклады
+    rng = random.Random(6)
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "deposits.csv")
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            for сумма, срок, ставка in zip(*make_book(rows)):
+                тип = rng.choice(("Срочный", "Бонусный", "Капитализация"))
+                доп = (10000, 5) if тип == "Бонусный" else ()
+                writer.writerow((f"Клиент {rng.randrange(clients)}", тип, сумма, срок, ставка, *доп))
+        банк = Банк()
+        start = time.perf_counter()
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            opened = банк.открыть_вклады(csv.reader(f))
+        elapsed = time.perf_counter() - start
+    print(f"Открыто {opened} вкладов за {elapsed:.2f} с, {opened / elapsed:.0f} строк/с")
+
+
+def bench_cache(deposits=1000000, unique_share=10):
+    # Книга, где большинство клиентов держит одинаковые стандартные продукты;
+    # unique_share — процент вкладов с индивидуальными условиями
+    rng = random.Random(7)
+    продукты = [(тип, сумма, срок, ставка)
+                for тип in (СрочныйВклад, БонусныйВклад, ВкладСКапитализацией)
+                for сумма in (10000, 50000, 100000, 500000)
+                for срок, ставка in ((6, 12), (12, 14.5), (24, 11), (36, 9.5))]
+    def книга():
+        for _ in range(deposits):
+            if rng.randrange(100) < unique_share:
+                yield rng.choice((СрочныйВклад, ВкладСКапитализацией))(rng.randint(1000, 5000000), 12, 14.5)
+            else:
+                тип, сумма, срок, ставка = rng.choice(продукты)
+                yield тип(сумма, срок, ставка)
+    вклады = list(книга())
+    for name, размер in (("без общего кэша", 0), ("общий LRU", 100000)):
+        cache = КэшПрибыли(размер)
+        previous = установить_кэш_прибыли(cache)
+        for вклад in вклады:
+            вклад.сбросить_прибыль()
+        start = time.perf_counter()
+        for вклад in вклады:
+            вклад.рассчитать_прибыль()
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        for вклад in вклады:
+            вклад.рассчитать_прибыль()
+        warm = time.perf_counter() - start
+        установить_кэш_прибыли(previous)
+        print(f"{name:>16}: первый проход {deposits / cold:9.0f} вкладов/с, повторный {deposits / warm:9.0f} вкладов/с")
+        print(f"{'':>16}  {cache.статистика}")
+
+
+def bench_schedule(deposits=100000, clients=10000):
+    # Потоковая выгрузка помесячных графиков всех вкладов в CSV: строк/с и пик памяти
+    банк, _ = make_bank(deposits, clients)
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "schedule.csv")
+        start = time.perf_counter()
+        rows = банк.экспорт_графиков(path)
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(path)
+        # Память меряется отдельным проходом: tracemalloc сильно замедляет выгрузку
+        tracemalloc.start()
+        банк.экспорт_графиков(path)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    print(f"Выгружено {rows} строк ({size / 2 ** 20:.0f} МБ) за {elapsed:.2f} с, {rows / elapsed:.0f} строк/с, "
+          f"пик памяти {peak / 2 ** 10:.0f} КБ")
+
+
+BENCHMARKS = {
+    "capitalization": bench_capitalization,
+    "revalue": bench_revalue,
+    "onboarding": bench_onboarding,
+    "cache": bench_cache,
+    "schedule": bench_schedule,
+}
+
+if __name__ == "__main__":
+    # Использование: python bench.py <замер> [параметры...]
+    name = sys.argv[1] if len(sys.argv) > 1 else "capitalization"
+    BENCHMARKS[name](*(int(a) for a in sys.argv[2:]))
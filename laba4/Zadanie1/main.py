@@ -1,6 +1,111 @@
 from abc import ABC, abstractmethod
+import csv
+import functools
+import math
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from datetime import datetime
 
+try:
+    import numpy as np
+except ImportError:  # без NumPy пакетный расчёт идёт поэлементно в Python
+    np = None
+
+
+# np.round масштабирует значения на 100 и у значений около половины копейки может
+# округлить иначе, чем round(); такие значения досчитываются round() поштучно.
+# Умножение на 100 ошибается на доли ulp, поэтому окрестность растёт с числом копеек
+def _округлить_пакет(значения):
+    копейки = значения * 100
+    результат = np.rint(копейки) / 100
+    допуск = np.maximum(1e-6, 4 * np.abs(копейки) * sys.float_info.epsilon)
+    for i in np.flatnonzero(np.abs(копейки - np.floor(копейки) - 0.5) < допуск):
+        результат[i] = round(float(значения[i]), 2)
+    return результат
+
+
+# Замкнутая форма сложных процентов отличается от помесячного цикла на доли копейки:
+# каждый месяц цикла ошибается на ulp остатка, так что расхождение не превышает
+# остаток_в_копейках * срок * eps. Если прибыль ближе такого допуска (но не меньше
+# _ДОПУСК_НИЧЬЕЙ) к половине копейки, отличие может изменить округление, и прибыль
+# досчитывается циклом — эталонным способом
+_ДОПУСК_НИЧЬЕЙ = 1e-4
+_ЗАПАС_ДОПУСКА = 4
+
+
+def _допуск_ничьей(остаток, срок):
+    return max(_ДОПУСК_НИЧЬЕЙ, _ЗАПАС_ДОПУСКА * abs(остаток) * 100 * срок * sys.float_info.epsilon)
+
+
+def _около_половины_копейки(копейки, допуск=_ДОПУСК_НИЧЬЕЙ):
+    return abs(копейки - math.floor(копейки) - 0.5) < допуск
+
+
+def _прибыль_с_капитализацией(сумма, срок, ставка):
+    месячная = ставка / 100 / 12
+    прибыль = сумма * math.expm1(срок * math.log1p(месячная))
+    if _около_половины_копейки(прибыль * 100, _допуск_ничьей(сумма + прибыль, срок)):
+        остаток = сумма
+        for _ in range(int(срок)):
+            остаток += остаток * месячная
+        прибыль = остаток - сумма
+    return round(прибыль, 2)
+
+# Общий LRU-кэш прибыли: одинаковые продукты разных клиентов считаются один раз.
+# Ключ — (тип вклада, параметры вклада), размер 0 отключает кэш.
+class КэшПрибыли:
+    def __init__(self, размер=100000):
+        self.__размер = размер
+        self.__значения = OrderedDict()
+        self.__попаданий = self.__промахов = self.__в_экземплярах = 0
+
+    def получить(self, ключ, расчёт):
+        try:
+            self.__значения.move_to_end(ключ)
+        except KeyError:
+            self.__промахов += 1
+            значение = расчёт()
+            if self.__размер > 0:
+                self.__значения[ключ] = значение
+                if len(self.__значения) > self.__размер:
+                    self.__значения.popitem(last=False)
+            return значение
+        self.__попаданий += 1
+        return self.__значения[ключ]
+
+    def _попадание_в_экземпляре(self):
+        self.__в_экземплярах += 1
+
+    @property
+    def статистика(self):
+        обращений = self.__попаданий + self.__промахов + self.__в_экземплярах
+        return {"в_экземплярах": self.__в_экземплярах, "попаданий": self.__попаданий, "промахов": self.__промахов,
+                "доля_попаданий": (обращений - self.__промахов) / обращений if обращений else 0.0,
+                "размер": len(self.__значения)}
+
+    def очистить(self):
+        self.__значения.clear()
+        self.__попаданий = self.__промахов = self.__в_экземплярах = 0
+
+
+КЭШ_ПРИБЫЛИ = КэшПрибыли()
+
+
+def установить_кэш_прибыли(кэш):
+    global КЭШ_ПРИБЫЛИ
+    предыдущий, КЭШ_ПРИБЫЛИ = КЭШ_ПРИБЫЛИ, кэш
+    return предыдущий
+
+
+# Декоратор рассчитать_прибыль: результат хранится в вкладе и в общем кэше КЭШ_ПРИБЫЛИ
+def кэшировать_прибыль(расчёт):
+    @functools.wraps(расчёт)
+    def обёртка(self):
+        return self._прибыль_из_кэша(расчёт)
+    return обёртка
+
 # Абстракция: базовый класс Вклад
 class Вклад(ABC):
     def __init__(self, сумма, срок_в_месяцах, процентная_ставка):
@@ -8,6 +113,7 @@ class Вклад(ABC):
         self.__срок_в_месяцах = int(срок_в_месяцах)
         self.__процентная_ставка = float(процентная_ставка)
         self.__дата_открытия = datetime.now()
+        self.__прибыль = None
 
     # Инкапсуляция: геттеры
     @property
@@ -26,6 +132,42 @@ class Вклад(ABC):
     def рассчитать_прибыль(self):
         pass
 
+    # Параметры, от которых зависит прибыль: часть ключа общего кэша
+    def _параметры(self):
+        return (self.__сумма, self.__срок_в_месяцах, self.__процентная_ставка)
+
+    def _прибыль_из_кэша(self, расчёт):
+        if self.__прибыль is None:
+            ключ = (type(self),) + self._параметры()
+            self.__прибыль = КЭШ_ПРИБЫЛИ.получить(ключ, lambda: расчёт(self))
+        else:
+            КЭШ_ПРИБЫЛИ._попадание_в_экземпляре()
+        return self.__прибыль
+
+    # Сброс сохранённой прибыли; нужен, если параметры вклада изменятся
+    def сбросить_прибыль(self):
+        self.__прибыль = None
+
+    # Помесячный график (месяц, остаток, проценты за месяц) в целых копейках.
+    # накоплено(месяц) — точные проценты, начисленные к концу месяца. Остаток каждого
+    # месяца — округлённая до копейки сумма с ними, а в последнем месяце — ровно
+    # сумма + рассчитать_прибыль(). Проценты месяца — разность соседних остатков,
+    # поэтому копейки округления уходят в последний месяц и проценты сходятся с прибылью
+    def _график(self, накоплено):
+        начало = round(self.__сумма * 100)
+        конец = начало + round(self.рассчитать_прибыль() * 100)
+        прежний = начало
+        for месяц in range(1, self.__срок_в_месяцах + 1):
+            остаток = конец if месяц == self.__срок_в_месяцах else начало + round(накоплено(месяц) * 100)
+            yield месяц, остаток / 100, (остаток - прежний) / 100
+            прежний = остаток
+
+    # Столбцы параметров для пакетного расчёта прибыль_пакетом(*столбцы)
+    @classmethod
+    def _столбцы(cls, вклады):
+        return ([в.__сумма for в in вклады], [в.__срок_в_месяцах for в in вклады],
+                [в.__процентная_ставка for в in вклады])
+
     # Полиморфизм: стандартные методы
     def __str__(self):
         return f"{self.__class__.__name__} (Сумма: {self.__сумма} руб., Срок: {self.__срок_в_месяцах} мес., Ставка: {self.__процентная_ставка}%)"
@@ -39,11 +181,27 @@ class Вклад(ABC):
 
 # Наследование: конкретные типы вкладов
 class СрочныйВклад(Вклад):
+    @кэшировать_прибыль
     def рассчитать_прибыль(self):
         # Простые проценты: Прибыль = Сумма * Ставка * Срок / 12
         прибыль = self.сумма * (self.процентная_ставка / 100) * (self.срок_в_месяцах / 12)
         return round(прибыль, 2)
 
+    # Помесячный график: проценты начисляются равными частями и не капитализируются
+    def график(self):
+        проценты = self.сумма * (self.процентная_ставка / 100) / 12
+        return self._график(lambda месяц: проценты * месяц)
+
+    @staticmethod
+    def прибыль_пакетом(суммы, сроки, ставки):
+        if np is None:
+            return [round(сумма * (ставка / 100) * (срок / 12), 2)
+                    for сумма, срок, ставка in zip(суммы, сроки, ставки)]
+        суммы = np.asarray(суммы, dtype=np.float64)
+        сроки = np.asarray(сроки, dtype=np.float64)
+        ставки = np.asarray(ставки, dtype=np.float64)
+        return _округлить_пакет(суммы * (ставки / 100) * (сроки / 12))
+
 class БонусныйВклад(Вклад):
     def __init__(self, сумма, срок_в_месяцах, процентная_ставка, минимальная_сумма_для_бонуса=10000, бонус_ставка=5):
         super().__init__(сумма, срок_в_месяцах, процентная_ставка)
@@ -54,6 +212,11 @@ class БонусныйВклад(Вклад):
     def минимальная_сумма_для_бонуса(self):
         return self.__минимальная_сумма_для_бонуса
 
+    @property
+    def бонус_ставка(self):
+        return self.__бонус_ставка
+
+    @кэшировать_прибыль
     def рассчитать_прибыль(self):
         прибыль = self.сумма * (self.процентная_ставка / 100) * (self.срок_в_месяцах / 12)
         if self.сумма >= self.__минимальная_сумма_для_бонуса:
@@ -61,15 +224,64 @@ class БонусныйВклад(Вклад):
             прибыль += бонус
         return round(прибыль, 2)
 
+    # Как у СрочныйВклад, но при сумме не меньше минимальной каждый месяц начисляется и бонус
+    def график(self):
+        проценты = self.сумма * (self.процентная_ставка / 100) / 12
+        if self.сумма >= self.__минимальная_сумма_для_бонуса:
+            проценты += проценты * (self.__бонус_ставка / 100)
+        return self._график(lambda месяц: проценты * месяц)
+
+    def _параметры(self):
+        return super()._параметры() + (self.__минимальная_сумма_для_бонуса, self.__бонус_ставка)
+
+    @classmethod
+    def _столбцы(cls, вклады):
+        return super()._столбцы(вклады) + ([в.__минимальная_сумма_для_бонуса for в in вклады],
+                                           [в.__бонус_ставка for в in вклады])
+
+    @staticmethod
+    def прибыль_пакетом(суммы, сроки, ставки, минимумы, бонусы):
+        if np is None:
+            результат = []
+            for сумма, срок, ставка, минимум, бонус in zip(суммы, сроки, ставки, минимумы, бонусы):
+                прибыль = сумма * (ставка / 100) * (срок / 12)
+                if сумма >= минимум:
+                    прибыль += прибыль * (бонус / 100)
+                результат.append(round(прибыль, 2))
+            return результат
+        суммы = np.asarray(суммы, dtype=np.float64)
+        прибыль = суммы * (np.asarray(ставки, dtype=np.float64) / 100) * (np.asarray(сроки, dtype=np.float64) / 12)
+        бонус = прибыль * (np.asarray(бонусы, dtype=np.float64) / 100)
+        return _округлить_пакет(np.where(суммы >= np.asarray(минимумы, dtype=np.float64), прибыль + бонус, прибыль))
+
 class ВкладСКапитализацией(Вклад):
+    @кэшировать_прибыль
     def рассчитать_прибыль(self):
-        # Капитализация: сложные проценты, ежемесячная капитализация
-        сумма = self.сумма
-        ставка = self.процентная_ставка / 100 / 12  # Месячная ставка
-        for _ in range(self.срок_в_месяцах):
-            сумма += сумма * ставка
-        прибыль = сумма - self.сумма
-        return round(прибыль, 2)
+        # Капитализация: сложные проценты, ежемесячная капитализация.
+        # Прибыль = Сумма * ((1 + r)^n - 1) в замкнутой форме; expm1/log1p не теряют
+        # точность при малой месячной ставке r. Около половины копейки — цикл
+        return _прибыль_с_капитализацией(self.сумма, self.срок_в_месяцах, self.процентная_ставка)
+
+    # Помесячный график с капитализацией процентов: накопленное — та же замкнутая форма
+    def график(self):
+        ставка = math.log1p(self.процентная_ставка / 100 / 12)
+        return self._график(lambda месяц: self.сумма * math.expm1(месяц * ставка))
+
+    # Пакетный расчёт по массивам сумм, сроков и годовых ставок (%) той же формулой
+    @staticmethod
+    def прибыль_пакетом(суммы, сроки, ставки):
+        if np is None:
+            return [_прибыль_с_капитализацией(сумма, срок, ставка) for сумма, срок, ставка in zip(суммы, сроки, ставки)]
+        суммы = np.asarray(суммы, dtype=np.float64)
+        сроки = np.asarray(сроки, dtype=np.float64)
+        ставки = np.asarray(ставки, dtype=np.float64)
+        прибыль = суммы * np.expm1(сроки * np.log1p(ставки / 100 / 12))
+        результат = _округлить_пакет(прибыль)
+        копейки = прибыль * 100
+        допуск = np.maximum(_ДОПУСК_НИЧЬЕЙ, _ЗАПАС_ДОПУСКА * np.abs(суммы + прибыль) * 100 * сроки * sys.float_info.epsilon)
+        for i in np.flatnonzero(np.abs(копейки - np.floor(копейки) - 0.5) < допуск):
+            результат[i] = _прибыль_с_капитализацией(float(суммы[i]), int(сроки[i]), float(ставки[i]))
+        return результат
 
 # Композиция: класс Клиент
 class Клиент:
@@ -92,34 +304,125 @@ class Клиент:
         вклады_список = "\n".join(str(вклад) for вклад in self.__вклады)
         return f"Клиент {self.__имя}:\n{вклады_список}"
 
+# Расчёт части группы в процессе пула
+def _прибыль_части(тип, столбцы):
+    return тип.прибыль_пакетом(*столбцы)
+
+# Типы вкладов по названию, принятому в Банк.__call__ и Банк.открыть_вклады
+ТИПЫ_ВКЛАДОВ = {
+    "Срочный": СрочныйВклад,
+    "Бонусный": БонусныйВклад,
+    "Капитализация": ВкладСКапитализацией,
+}
+
 # Класс Банк
 class Банк:
     def __init__(self):
         self.__клиенты = []
+        # Индекс имя -> клиент; при повторном имени остаётся первый клиент, как при поиске по списку
+        self.__по_имени = {}
 
     def добавить_клиента(self, клиент):
         self.__клиенты.append(клиент)
+        self.__по_имени.setdefault(клиент.имя, клиент)
 
-    # Вызываемый метод для расчёта прибыли
-    def __call__(self, клиент_имя, вклад_тип, сумма, срок, ставка, **kwargs):
-        клиент = next((c for c in self.__клиенты if c.имя == клиент_имя), None)
-        if not клиент:
-            клиент = Клиент(клиент_имя)
+    def найти_клиента(self, имя):
+        return self.__по_имени.get(имя)
+
+    def __клиент(self, имя):
+        клиент = self.__по_имени.get(имя)
+        if клиент is None:
+            клиент = Клиент(имя)
             self.добавить_клиента(клиент)
-        
-        if вклад_тип == "Срочный":
-            вклад = СрочныйВклад(сумма, срок, ставка)
-        elif вклад_тип == "Бонусный":
-            вклад = БонусныйВклад(сумма, срок, ставка, **kwargs)
-        elif вклад_тип == "Капитализация":
-            вклад = ВкладСКапитализацией(сумма, срок, ставка)
-        else:
+        return клиент
+
+    @staticmethod
+    def __создать_вклад(вклад_тип, сумма, срок, ставка, *args, **kwargs):
+        тип = ТИПЫ_ВКЛАДОВ.get(вклад_тип)
+        if тип is None:
             raise ValueError("Неверный тип вклада")
-        
-        клиент.добавить_вклад(вклад)
+        return тип(сумма, срок, ставка, *args, **kwargs)
+
+    # Вызываемый метод для расчёта прибыли
+    def __call__(self, клиент_имя, вклад_тип, сумма, срок, ставка, **kwargs):
+        вклад = self.__создать_вклад(вклад_тип, сумма, срок, ставка, **kwargs)
+        self.__клиент(клиент_имя).добавить_вклад(вклад)
         прибыль = вклад.рассчитать_прибыль()
         return f"Для клиента {клиент_имя} добавлен {вклад_тип} вклад. Прибыль: {прибыль} руб."
 
+    # Массовое открытие вкладов за один проход, без расчёта прибыли. Строка — последовательность
+    # (клиент_имя, вклад_тип, сумма, срок, ставка, *доп. параметры типа), например строка csv.reader;
+    # числа могут быть строками. Возвращает число открытых вкладов.
+    def открыть_вклады(self, rows):
+        количество = 0
+        for номер, строка in enumerate(rows, 1):
+            try:
+                клиент_имя, вклад_тип, сумма, срок, ставка, *доп = строка
+                вклад = self.__создать_вклад(вклад_тип, сумма, срок, ставка, *доп)
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"Строка {номер}: {e}") from e
+            self.__клиент(клиент_имя).добавить_вклад(вклад)
+            количество += 1
+        return количество
+
+    # Потоковая выгрузка графиков всех вкладов в CSV: строки порождаются генераторами
+    # график() и сразу пишутся в файл, поэтому память не растёт с размером банка.
+    # Возвращает число строк без заголовка.
+    def экспорт_графиков(self, filename):
+        with open(filename, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(("клиент", "вклад", "тип", "месяц", "остаток", "проценты"))
+            строк = 0
+            for клиент in self.__клиенты:
+                for номер, вклад in enumerate(клиент.вклады, 1):
+                    начало = (клиент.имя, номер, type(вклад).__name__)
+                    writer.writerows(начало + строка for строка in вклад.график())
+                    строк += вклад.срок_в_месяцах
+        return строк
+
+    # Переоценка всего портфеля: вклады группируются по типу, и каждая группа считается
+    # пакетным расчётом типа (при процессов > 1 — частями по размер_части в пуле процессов).
+    # Типы без своего прибыль_пакетом считаются поштучно через рассчитать_прибыль.
+    # Возвращает суммарную прибыль по клиентам и по типам вкладов.
+    def переоценить(self, процессов=None, размер_части=1000000):
+        группы = {}
+        for номер, клиент in enumerate(self.__клиенты):
+            for вклад in клиент.вклады:
+                группа = группы.get(type(вклад))
+                if группа is None:
+                    группа = группы[type(вклад)] = ([], [])
+                группа[0].append(номер)
+                группа[1].append(вклад)
+        по_клиентам = [0.0] * len(self.__клиенты)
+        по_типам = {}
+        with ProcessPoolExecutor(процессов) if процессов and процессов > 1 else nullcontext() as пул:
+            for тип, (номера, вклады) in группы.items():
+                прибыли = self.__прибыль_группы(тип, вклады, пул, размер_части)
+                if np is not None:
+                    прибыли = np.asarray(прибыли, dtype=np.float64)
+                    по_клиентам = np.bincount(номера, weights=прибыли, minlength=len(по_клиентам)) + по_клиентам
+                else:
+                    for номер, прибыль in zip(номера, прибыли):
+                        по_клиентам[номер] += прибыль
+                по_типам[тип.__name__] = round(math.fsum(прибыли), 2)
+        итоги = {}
+        for клиент, прибыль in zip(self.__клиенты, по_клиентам):
+            итоги[клиент.имя] = round(итоги.get(клиент.имя, 0.0) + float(прибыль), 2)
+        return {"клиенты": итоги, "типы": по_типам}
+
+    @staticmethod
+    def __прибыль_группы(тип, вклады, пул, размер_части):
+        # Без NumPy и пула пакетный расчёт не быстрее поштучного: столбцы пришлось бы собирать отдельно
+        if "прибыль_пакетом" not in vars(тип) or (np is None and пул is None):
+            return [вклад.рассчитать_прибыль() for вклад in вклады]
+        if пул is None:
+            return тип.прибыль_пакетом(*тип._столбцы(вклады))
+        части = [тип._столбцы(вклады[i:i + размер_части]) for i in range(0, len(вклады), размер_части)]
+        прибыли = []
+        for часть in пул.map(_прибыль_части, [тип] * len(части), части):
+            прибыли.extend(часть)
+        return прибыли
+
 # Пример использования
 if __name__ == "__main__":
     банк = Банк()
@@ -130,7 +433,7 @@ if __name__ == "__main__":
     print(банк("Иван", "Капитализация", 10000, 12, 5))  # С капитализацией
     
     # Вывод информации о клиенте
-    клиент = next(c for c in банк._Банк__клиенты if c.имя == "Иван")
+    клиент = банк.найти_клиента("Иван")
     print(клиент)
     
     # Проверка полиморфизма
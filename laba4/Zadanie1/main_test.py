@@ -0,0 +1,278 @@
+import csv
+import math
+import os
+import random
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+import main
+from main import Банк, Клиент, БонусныйВклад, ВкладСКапитализацией, КэшПрибыли, СрочныйВклад
+
+
+def прибыль_циклом(сумма, срок, ставка):
+    # Помесячный расчёт — эталон для сверки
+    итог = сумма
+    месячная = ставка / 100 / 12
+    for _ in range(срок):
+        итог += итог * месячная
+    return round(итог - сумма, 2)
+
+
+def портфель(количество, seed=7):
+    rng = random.Random(seed)
+    # Целые суммы, сроки в один месяц и суммы до 1e10 чаще всего дают прибыль около половины копейки
+    суммы = [rng.randint(1000, 10 ** 10) + (rng.randint(0, 99) / 100 if i % 2 else 0) for i in range(количество)]
+    сроки = [rng.choice([1, 3, 6, 12, 24, 36, 60, 120]) for _ in range(количество)]
+    ставки = [rng.choice([1, 5, 7.5, 12, 18.25, 24]) for _ in range(количество)]
+    return суммы, сроки, ставки
+
+
+class TestCompoundInterest(unittest.TestCase):
+    # Вклады, на которых постоянный допуск расходился с циклом
+    БОЛЬШИЕ_СУММЫ = [
+        (2738114857, 120, 24), (6940763192, 24, 18.25), (8827566977, 36, 24),
+        (7899835296.32, 120, 12), (7243634206, 60, 5), (8158478776.83, 60, 24),
+    ]
+
+    def setUp(self):
+        """Сбрасываем общий кэш прибыли, чтобы считались сами формулы"""
+        main.КЭШ_ПРИБЫЛИ.очистить()
+
+    def test_large_sums_match_loop(self):
+        """Проверяем, что у больших сумм замкнутая форма совпадает с циклом до копейки"""
+        for сумма, срок, ставка in self.БОЛЬШИЕ_СУММЫ:
+            with self.subTest(сумма=сумма, срок=срок, ставка=ставка):
+                self.assertEqual(ВкладСКапитализацией(сумма, срок, ставка).рассчитать_прибыль(),
+                                 прибыль_циклом(сумма, срок, ставка))
+
+    def test_portfolio_matches_loop(self):
+        """Проверяем, что поштучный расчёт совпадает с циклом на всём портфеле"""
+        for сумма, срок, ставка in zip(*портфель(20000)):
+            self.assertEqual(main._прибыль_с_капитализацией(сумма, срок, ставка), прибыль_циклом(сумма, срок, ставка))
+
+    def test_batch_without_numpy_matches_loop(self):
+        """Проверяем пакетный расчёт без NumPy"""
+        суммы, сроки, ставки = портфель(5000, seed=8)
+        with mock.patch.object(main, "np", None):
+            прибыли = ВкладСКапитализацией.прибыль_пакетом(суммы, сроки, ставки)
+        self.assertEqual(list(прибыли), [прибыль_циклом(*вклад) for вклад in zip(суммы, сроки, ставки)])
+
+    @unittest.skipIf(main.np is None, "NumPy не установлен")
+    def test_batch_with_numpy_matches_loop(self):
+        """Проверяем, что векторный расчёт совпадает с циклом, включая большие суммы"""
+        суммы, сроки, ставки = портфель(20000, seed=9)
+        for сумма, срок, ставка in self.БОЛЬШИЕ_СУММЫ:
+            суммы.append(сумма)
+            сроки.append(срок)
+            ставки.append(ставка)
+        прибыли = ВкладСКапитализацией.прибыль_пакетом(суммы, сроки, ставки)
+        self.assertEqual([float(п) for п in прибыли], [прибыль_циклом(*вклад) for вклад in zip(суммы, сроки, ставки)])
+
+
+class TestBankClients(unittest.TestCase):
+    def setUp(self):
+        """Пустой банк и пустой общий кэш прибыли"""
+        main.КЭШ_ПРИБЫЛИ.очистить()
+        self.банк = Банк()
+
+    def test_call_reuses_client(self):
+        """Проверяем, что вклады одного имени попадают к одному клиенту"""
+        self.банк("Иван", "Срочный", 10000, 12, 5)
+        self.банк("Иван", "Капитализация", 10000, 12, 5)
+        self.банк("Мария", "Срочный", 5000, 6, 4)
+        иван = self.банк.найти_клиента("Иван")
+        self.assertEqual(len(иван.вклады), 2)
+        self.assertEqual(len(self.банк.найти_клиента("Мария").вклады), 1)
+        self.assertIsNone(self.банк.найти_клиента("Пётр"))
+
+    def test_duplicate_name_finds_first_client(self):
+        """Проверяем, что при повторном имени находится первый добавленный клиент"""
+        первый, второй = Клиент("Иван"), Клиент("Иван")
+        self.банк.добавить_клиента(первый)
+        self.банк.добавить_клиента(второй)
+        self.банк("Иван", "Срочный", 10000, 12, 5)
+        self.assertIs(self.банк.найти_клиента("Иван"), первый)
+        self.assertEqual((len(первый.вклады), len(второй.вклады)), (1, 0))
+
+    def test_open_deposits_from_rows(self):
+        """Проверяем массовое открытие вкладов из строк со строковыми числами"""
+        строки = [
+            ("Иван", "Срочный", "10000", "12", "5"),
+            ("Мария", "Бонусный", "15000", "12", "6", "10000", "5"),
+            ("Иван", "Капитализация", 20000, 24, 7.5),
+        ]
+        self.assertEqual(self.банк.открыть_вклады(строки), 3)
+        иван = self.банк.найти_клиента("Иван")
+        self.assertEqual([type(в) for в in иван.вклады], [СрочныйВклад, ВкладСКапитализацией])
+        бонусный = self.банк.найти_клиента("Мария").вклады[0]
+        self.assertIsInstance(бонусный, БонусныйВклад)
+        self.assertEqual(бонусный.бонус_ставка, 5.0)
+
+    def test_open_deposits_reports_row(self):
+        """Проверяем, что ошибка в строке называет её номер"""
+        for строка in [("Иван", "Вечный", 1, 1, 1), ("Иван", "Срочный", 1000), ("Иван", "Срочный", "много", 12, 5)]:
+            with self.subTest(строка=строка):
+                with self.assertRaisesRegex(ValueError, "^Строка 2: "):
+                    Банк().открыть_вклады([("Иван", "Срочный", 1000, 12, 5), строка])
+
+
+class TestBankRevaluation(unittest.TestCase):
+    def setUp(self):
+        """Банк с вкладами всех типов, в том числе у двух клиентов с одним именем"""
+        main.КЭШ_ПРИБЫЛИ.очистить()
+        self.банк = Банк()
+        rng = random.Random(3)
+        типы = ["Срочный", "Бонусный", "Капитализация"]
+        строки = [(f"Клиент {i % 7}", типы[i % 3], rng.randint(1000, 50000) + rng.randint(0, 99) / 100,
+                   rng.choice([1, 6, 12, 36]), rng.choice([4, 5.5, 12])) for i in range(300)]
+        self.банк.добавить_клиента(Клиент("Клиент 0"))
+        self.банк.открыть_вклады(строки)
+        второй = Клиент("Клиент 0")
+        второй.добавить_вклад(СрочныйВклад(10000, 12, 5))
+        self.банк.добавить_клиента(второй)
+        self.клиенты = [self.банк.найти_клиента(f"Клиент {i}") for i in range(7)] + [второй]
+
+    def ожидаемые_итоги(self):
+        клиенты, типы = {}, {}
+        for клиент in self.клиенты:
+            for вклад in клиент.вклады:
+                прибыль = вклад.рассчитать_прибыль()
+                клиенты.setdefault(клиент.имя, []).append(прибыль)
+                типы.setdefault(type(вклад).__name__, []).append(прибыль)
+        return ({имя: round(math.fsum(п), 2) for имя, п in клиенты.items()},
+                {тип: round(math.fsum(п), 2) for тип, п in типы.items()})
+
+    def проверить(self, итоги):
+        клиенты, типы = self.ожидаемые_итоги()
+        self.assertEqual(set(итоги["клиенты"]), set(клиенты))
+        for имя, прибыль in клиенты.items():
+            self.assertAlmostEqual(итоги["клиенты"][имя], прибыль, places=2)
+        self.assertEqual(итоги["типы"], типы)
+
+    def test_matches_per_deposit_profit(self):
+        """Проверяем, что переоценка совпадает с суммой рассчитать_прибыль по вкладам"""
+        self.проверить(self.банк.переоценить())
+
+    def test_without_numpy(self):
+        """Проверяем переоценку без NumPy"""
+        with mock.patch.object(main, "np", None):
+            итоги = self.банк.переоценить()
+        self.проверить(итоги)
+
+    def test_process_pool_in_parts(self):
+        """Проверяем расчёт частями в пуле процессов"""
+        self.проверить(self.банк.переоценить(процессов=2, размер_части=17))
+
+    def test_empty_bank(self):
+        """Проверяем переоценку банка без вкладов"""
+        банк = Банк()
+        банк.добавить_клиента(Клиент("Иван"))
+        self.assertEqual(банк.переоценить(), {"клиенты": {"Иван": 0.0}, "типы": {}})
+
+
+class TestProfitCache(unittest.TestCase):
+    def setUp(self):
+        """Каждый тест работает со своим общим кэшем"""
+        self.кэш = КэшПрибыли(размер=2)
+        self.прежний = main.установить_кэш_прибыли(self.кэш)
+
+    def tearDown(self):
+        main.установить_кэш_прибыли(self.прежний)
+
+    def test_equal_deposits_share_profit(self):
+        """Проверяем, что одинаковые вклады разных клиентов считаются один раз"""
+        первый, второй = СрочныйВклад(10000, 12, 5), СрочныйВклад(10000, 12, 5)
+        self.assertEqual(первый.рассчитать_прибыль(), 500.0)
+        self.assertEqual(второй.рассчитать_прибыль(), 500.0)
+        первый.рассчитать_прибыль()
+        статистика = self.кэш.статистика
+        self.assertEqual((статистика["промахов"], статистика["попаданий"], статистика["в_экземплярах"]), (1, 1, 1))
+        self.assertAlmostEqual(статистика["доля_попаданий"], 2 / 3)
+
+    def test_key_includes_type_and_parameters(self):
+        """Проверяем, что вклады других типов и с другими бонусами не делят прибыль"""
+        self.assertEqual(СрочныйВклад(20000, 12, 5).рассчитать_прибыль(), 1000.0)
+        self.assertEqual(БонусныйВклад(20000, 12, 5).рассчитать_прибыль(), 1050.0)
+        self.assertEqual(БонусныйВклад(20000, 12, 5, бонус_ставка=10).рассчитать_прибыль(), 1100.0)
+        self.assertEqual(self.кэш.статистика["промахов"], 3)
+
+    def test_least_recently_used_is_dropped(self):
+        """Проверяем, что кэш хранит не больше заданного числа значений и вытесняет давние"""
+        for сумма in (1000, 2000):
+            СрочныйВклад(сумма, 12, 5).рассчитать_прибыль()
+        СрочныйВклад(1000, 12, 5).рассчитать_прибыль()
+        СрочныйВклад(3000, 12, 5).рассчитать_прибыль()
+        СрочныйВклад(1000, 12, 5).рассчитать_прибыль()
+        СрочныйВклад(2000, 12, 5).рассчитать_прибыль()
+        статистика = self.кэш.статистика
+        self.assertEqual((статистика["промахов"], статистика["попаданий"], статистика["размер"]), (4, 2, 2))
+
+    def test_zero_size_disables_cache(self):
+        """Проверяем, что кэш нулевого размера ничего не хранит"""
+        main.установить_кэш_прибыли(КэшПрибыли(0))
+        for _ in range(2):
+            СрочныйВклад(1000, 12, 5).рассчитать_прибыль()
+        self.assertEqual(main.КЭШ_ПРИБЫЛИ.статистика["промахов"], 2)
+        self.assertEqual(main.КЭШ_ПРИБЫЛИ.статистика["размер"], 0)
+
+    def test_reset_profit(self):
+        """Проверяем, что после сбросить_прибыль вклад снова обращается к общему кэшу"""
+        вклад = ВкладСКапитализацией(10000, 12, 5)
+        прибыль = вклад.рассчитать_прибыль()
+        вклад.сбросить_прибыль()
+        self.assertEqual(вклад.рассчитать_прибыль(), прибыль)
+        self.assertEqual(self.кэш.статистика["попаданий"], 1)
+        self.кэш.очистить()
+        self.assertEqual(self.кэш.статистика["размер"], 0)
+
+
+class TestSchedules(unittest.TestCase):
+    def setUp(self):
+        """Сбрасываем общий кэш прибыли"""
+        main.КЭШ_ПРИБЫЛИ.очистить()
+
+    def вклады(self):
+        rng = random.Random(11)
+        for i in range(600):
+            тип = (СрочныйВклад, БонусныйВклад, ВкладСКапитализацией)[i % 3]
+            сумма = rng.randint(1000, 50000) + (rng.randint(0, 99) / 100 if i % 2 else 0)
+            yield тип(сумма, rng.choice([1, 2, 7, 12, 60]), rng.choice([3, 5.5, 7.25, 12]))
+
+    def test_schedule_is_lazy(self):
+        """Проверяем, что график — генератор"""
+        self.assertIsInstance(СрочныйВклад(10000, 12, 5).график(), types.GeneratorType)
+
+    def test_schedule_reconciles_with_profit(self):
+        """Проверяем, что проценты графика в сумме дают ровно рассчитать_прибыль"""
+        for вклад in self.вклады():
+            with self.subTest(вклад=str(вклад)):
+                график = list(вклад.график())
+                self.assertEqual([строка[0] for строка in график], list(range(1, вклад.срок_в_месяцах + 1)))
+                self.assertEqual(график[-1][1], round(вклад.сумма + вклад.рассчитать_прибыль(), 2))
+                self.assertEqual(sum(round(строка[2] * 100) for строка in график),
+                                 round(вклад.рассчитать_прибыль() * 100))
+                прежний = вклад.сумма
+                for _, остаток, проценты in график:
+                    self.assertAlmostEqual(остаток - прежний, проценты, places=6)
+                    прежний = остаток
+
+    def test_export_schedules(self):
+        """Проверяем выгрузку графиков всех вкладов банка в CSV"""
+        банк = Банк()
+        банк("Иван", "Срочный", 10000, 12, 5)
+        банк("Мария", "Капитализация", 5000, 3, 6)
+        with tempfile.TemporaryDirectory() as папка:
+            путь = os.path.join(папка, "графики.csv")
+            self.assertEqual(банк.экспорт_графиков(путь), 15)
+            with open(путь, encoding="utf-8", newline="") as f:
+                строки = list(csv.reader(f))
+        self.assertEqual(строки[0], ["клиент", "вклад", "тип", "месяц", "остаток", "проценты"])
+        self.assertEqual(len(строки), 16)
+        self.assertEqual(строки[12][:5], ["Иван", "1", "СрочныйВклад", "12", "10500.0"])
+        self.assertEqual(строки[13][:4], ["Мария", "1", "ВкладСКапитализацией", "1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
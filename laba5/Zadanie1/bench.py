@@ -0,0 +1,210 @@
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+import vector_collection_module as vcm
+from vector_collection_module import (ColumnarVectorCollection, ExtendedVectorCollection, VectorCollection, Заказ,
+                                      КомпактныйЗаказ)
+
+
+def bench_events(count=100000):
+    # Стоимость add/remove/__call__ с разными приёмниками событий
+    заказ = Заказ([("Пицца", 500), ("Кола", 100)])
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        sinks = (("без приёмника", vcm.EventSink()), ("консоль", vcm.ConsoleSink()),
+                 ("кольцевой буфер", vcm.RingBufferSink()))
+        results = []
+        for name, sink in sinks:
+            previous = vcm.set_sink(sink)
+            collection = VectorCollection()
+            start = time.perf_counter()
+            for _ in range(count):
+                collection.add(заказ)
+                collection()
+                collection.remove(len(collection.data) - 1)
+            results.append((name, time.perf_counter() - start))
+            vcm.set_sink(previous)
+    for name, elapsed in results:
+        print(f"{name:>16}: {count * 3 / elapsed:12.0f} операций/с")
+
+
+def make_orders(count, seed=1):
+    rng = random.Random(seed)
+    names = ["Пицца", "Кола", "Бургер", "Чай", "Вода", "Салат"]
+    for _ in range(count):
+        order = Заказ([(rng.choice(names), rng.randint(30, 900)) for _ in range(rng.randint(1, 3))])
+        order.статус = rng.choice(["в обработке", "оплачен", "доставлен"])
+        yield order
+
+
+def bench_columnar(count=200000):
+    # Память на заказ и скорость агрегатов: список объектов против столбцов
+    # (10M заказов: python bench.py columnar 10000000 — нужен большой запас памяти для списка)
+    results = {}
+    for cls in (VectorCollection, ColumnarVectorCollection):
+        tracemalloc.start()
+        if cls is VectorCollection:
+            collection = cls(list(make_orders(count)))
+        else:
+            collection = cls(make_orders(count))
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        start = time.perf_counter()
+        total = collection()
+        results[cls.__name__] = (memory / count, time.perf_counter() - start, total)
+        del collection
+    for name, (per_order, elapsed, total) in results.items():
+        print(f"{name:>24}: {per_order:7.0f} Б/заказ, сумма {total:.2f} за {elapsed * 1000:.2f} мс")
+
+
+def bench_slices(count=1000000, page=50):
+    # Постраничный обход: срез-представление против явной материализации страницы
+    orders = list(make_orders(1000))
+    collection = VectorCollection(orders * (count // len(orders)))
+    pages = range(0, len(collection.data), len(collection.data) // 100)
+    for name, make_page in (("представление", lambda i: collection[i:i + page]),
+                            ("материализация", lambda i: collection[i:i + page].materialize())):
+        start = time.perf_counter()
+        for i in pages:
+            make_page(i)()
+        elapsed = time.perf_counter() - start
+        print(f"{name:>15}: {elapsed / len(pages) * 1e6:8.1f} мкс на страницу из {page}")
+    start = time.perf_counter()
+    half = collection[::2]
+    print(f"Срез [::2] из {len(collection.data)} заказов: {(time.perf_counter() - start) * 1e6:.1f} мкс, "
+          f"в нём {len(half)} заказов")
+
+
+def bench_where(count=200000):
+    # Поиск "оплачен + Салат" за последний 1% заказов: полный перебор против индексов
+    collection = VectorCollection(list(make_orders(count)))
+    since = collection.data[-count // 100].дата_создания
+    start = time.perf_counter()
+    scanned = [o for o in collection.data
+               if o.статус == "оплачен" and o.дата_создания >= since
+               and any(т.наименование == "Салат" for т in o.товары)]
+    scan = time.perf_counter() - start
+    start = time.perf_counter()
+    collection.where()  # индексы строятся при первом where()
+    build = time.perf_counter() - start
+    start = time.perf_counter()
+    found = collection.where(статус="оплачен", since=since, contains="Салат")
+    indexed = time.perf_counter() - start
+    print(f"Перебор: {scan * 1000:.1f} мс ({len(scanned)}), where: {indexed * 1000:.2f} мс ({len(found)}), "
+          f"построение индексов {build * 1000:.0f} мс")
+
+
+def bench_jsonl(count=200000, appends=200):
+    # Сохранение/загрузка JSON против JSON Lines (1M заказов: python bench.py jsonl 1000000)
+    collection = VectorCollection(list(make_orders(count)))
+    with tempfile.TemporaryDirectory() as folder:
+        for name in ("orders.json", "orders.jsonl"):
+            path = os.path.join(folder, name)
+            start = time.perf_counter()
+            collection.save(path)
+            saved = time.perf_counter() - start
+            start = time.perf_counter()
+            VectorCollection().load(path)
+            loaded = time.perf_counter() - start
+            print(f"{name:>13}: сохранение {count / saved:9.0f} заказов/с, загрузка {count / loaded:9.0f} заказов/с")
+        start = time.perf_counter()
+        lazy = VectorCollection.iter_load(os.path.join(folder, "orders.jsonl"))
+        next(lazy)
+        print(f"iter_load: первый заказ через {(time.perf_counter() - start) * 1000:.1f} мс")
+        lazy.close()
+
+        extra = list(make_orders(appends, seed=2))
+        start = time.perf_counter()
+        for order in extra[:10]:
+            collection.add(order)
+            collection.save(os.path.join(folder, "orders.json"))
+        rewrite = (time.perf_counter() - start) / 10
+        collection.open_append(os.path.join(folder, "orders.jsonl"))
+        start = time.perf_counter()
+        for order in extra:
+            collection.add(order)
+        append = (time.perf_counter() - start) / appends
+        collection.close_append()
+        print(f"Добавление одного заказа: перезапись {rewrite * 1000:.1f} мс, дозапись {append * 1000:.3f} мс")
+
+
+def bench_shards(count=200000, shards=8):
+    # Ускорение шардированных save/load по числу процессов (5M заказов: python bench.py shards 5000000)
+    collection = VectorCollection(list(make_orders(count)))
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "orders.jsonl")
+        start = time.perf_counter()
+        collection.save(path)
+        VectorCollection().load(path)
+        base = time.perf_counter() - start
+        print(f"Один файл .jsonl: save+load {base:.2f} с (процессоров: {os.cpu_count()})")
+        for workers in (1, 2, 4, 8):
+            path = os.path.join(folder, f"sharded-{workers}")
+            start = time.perf_counter()
+            collection.save(path, shards=shards, workers=workers)
+            saved = time.perf_counter() - start
+            start = time.perf_counter()
+            VectorCollection().load(path, workers=workers)
+            loaded = time.perf_counter() - start
+            print(f"{workers} процессов: save {saved:.2f} с, load {loaded:.2f} с, "
+                  f"ускорение x{base / (saved + loaded):.2f}")
+
+
+def bench_evict(operations=1000000, max_size=10000):
+    # Смесь add (вытеснение после заполнения) и обращений по индексу для каждой политики
+    orders = list(make_orders(max_size * 2))
+    rng = random.Random(2)
+    reads = [rng.randrange(max_size + max_size // 10) for _ in range(operations // 2)]
+    for policy in ("fifo", "lru", "oldest"):
+        spilled = []
+        collection = ExtendedVectorCollection(max_size=max_size, policy=policy, on_evict=spilled.append)
+        start = time.perf_counter()
+        for i, index in enumerate(reads):
+            collection.add(orders[i % len(orders)])
+            try:
+                collection[index]
+            except IndexError:
+                pass
+        elapsed = time.perf_counter() - start
+        print(f"{policy:>6}: {operations / elapsed:10.0f} операций/с, {collection.stats}, сброшено {len(spilled)}")
+
+
+def bench_memory(count=100000):
+    # Байт на заказ, загруженный через from_dict, и сколько сверху добавляют индексы VectorCollection
+    # (они строятся при первом where())
+    records = json.loads(json.dumps([order.to_dict() for order in make_orders(count, seed=3)]))
+    variants = (("Заказ", Заказ.from_dict),
+                ("КомпактныйЗаказ", КомпактныйЗаказ.from_dict),
+                ("КомпактныйЗаказ, общие товары", lambda record: КомпактныйЗаказ.from_dict(record, общий=True)))
+    for name, load in variants:
+        tracemalloc.start()
+        orders = [load(record) for record in records]
+        loaded, _ = tracemalloc.get_traced_memory()
+        collection = VectorCollection(orders)
+        collection.where()
+        indexed, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name:>30}: {loaded / count:7.0f} байт/заказ, индексы коллекции +{(indexed - loaded) / count:.0f}")
+        del orders, collection
+
+
+BENCHMARKS = {
+    "events": bench_events,
+    "columnar": bench_columnar,
+    "slices": bench_slices,
+    "where": bench_where,
+    "jsonl": bench_jsonl,
+    "shards": bench_shards,
+    "evict": bench_evict,
+    "memory": bench_memory,
+}
+
+if __name__ == "__main__":
+    # Использование: python bench.py <замер> [параметры...]
+    name = sys.argv[1] if len(sys.argv) > 1 else "events"
+    BENCHMARKS[name](*(int(a) for a in sys.argv[2:]))
@@ -1,7 +1,8 @@
-from vector_collection_module import VectorCollection, ExtendedVectorCollection, Заказ
+from vector_collection_module import VectorCollection, ExtendedVectorCollection, Заказ, ConsoleSink, set_sink
 
 def main():
     print("Тестирование класса VectorCollection\n")
+    set_sink(ConsoleSink())
 
     # Создание объектов Заказ
     заказ1 = Заказ([("Пицца", 500), ("Кола", 100)])
@@ -16,7 +17,7 @@ def main():
     print(f"Срез (0:1):\n{collection[0:1]}")
 
     # Добавление и удаление
-    print(collection.add(Заказ([("Чай", 50]))))
+    print(collection.add(Заказ([("Чай", 50)])))
     print(f"После добавления:\n{collection}")
     print(collection.remove(1))
     print(f"После удаления:\n{collection}")
@@ -36,7 +37,7 @@ def main():
     print(f"Расширенная коллекция:\n{ext_collection}")
     print(ext_collection.add(заказ2))
     try:
-        ext_collection.add(Заказ([("Вода", 30])))  # Превышение max_size
+        ext_collection.add(Заказ([("Вода", 30)]))  # Превышение max_size
     except ValueError as e:
         print(f"Ошибка: {e}")
 
@@ -0,0 +1,397 @@
+import gc
+import math
+import os
+import tempfile
+import unittest
+import weakref
+from datetime import datetime, timedelta
+
+from vector_collection_module import (
+    ColumnarVectorCollection, ExtendedVectorCollection, VectorCollection, VectorCollectionView,
+    Заказ, КомпактныйЗаказ,
+)
+
+
+def заказ(*товары, статус="в обработке", дата=None):
+    z = Заказ(list(товары), статус)
+    if дата is not None:
+        z._Заказ__дата_создания = дата
+    return z
+
+
+class TestVectorCollectionIndexes(unittest.TestCase):
+    def setUp(self):
+        """Три заказа с разными датами, статусами и товарами"""
+        начало = datetime(2025, 1, 1)
+        self.заказы = [
+            заказ(("Салат", 200), дата=начало),
+            заказ(("Пицца", 500), ("Салат", 200), статус="оплачен", дата=начало + timedelta(days=1)),
+            заказ(("Кола", 100), статус="оплачен", дата=начало + timedelta(days=2)),
+        ]
+        self.начало = начало
+        self.коллекция = VectorCollection(self.заказы)
+
+    def test_indexes_are_built_on_first_where(self):
+        """Проверяем, что индексы не строятся до первого where()"""
+        self.assertFalse(self.коллекция.indexed)
+        self.assertEqual(self.коллекция.where(статус="оплачен"), self.заказы[1:])
+        self.assertTrue(self.коллекция.indexed)
+
+    def test_where_combines_filters(self):
+        """Проверяем пересечение фильтров по статусу, товару и дате"""
+        self.assertEqual(self.коллекция.where(статус="оплачен", contains="Салат"), [self.заказы[1]])
+        self.assertEqual(self.коллекция.where(since=self.начало + timedelta(days=1),
+                                              until=self.начало + timedelta(days=2)), [self.заказы[1]])
+        self.assertEqual(self.коллекция.where(contains="Суп"), [])
+
+    def test_indexes_follow_add_and_remove(self):
+        """Проверяем, что построенные индексы поддерживаются при add и remove"""
+        self.коллекция.where()
+        новый = заказ(("Салат", 150), статус="оплачен", дата=self.начало + timedelta(days=3))
+        self.коллекция.add(новый)
+        self.assertEqual(self.коллекция.where(contains="Салат"), [self.заказы[0], self.заказы[1], новый])
+        self.коллекция.remove(1)
+        self.assertEqual(self.коллекция.where(статус="оплачен"), [self.заказы[2], новый])
+        self.assertEqual(self.коллекция.where(contains="Пицца"), [])
+
+    def test_same_order_added_twice(self):
+        """Проверяем, что повторно добавленный заказ остаётся в индексах, пока есть хоть одна копия"""
+        self.коллекция.where()
+        self.коллекция.add(self.заказы[0])
+        self.коллекция.remove(0)
+        self.assertEqual(self.коллекция.where(contains="Салат"), [self.заказы[0], self.заказы[1]])
+
+    def test_status_change_updates_index(self):
+        """Проверяем, что смена статуса заказа переносит его в индексе статусов"""
+        self.коллекция.where()
+        self.заказы[0].статус = "доставлен"
+        self.assertEqual(self.коллекция.where(статус="доставлен"), [self.заказы[0]])
+        self.assertEqual(self.коллекция.where(статус="в обработке"), [])
+
+    def test_status_change_before_indexing(self):
+        """Проверяем, что смена статуса до построения индексов учитывается при построении"""
+        self.заказы[0].статус = "доставлен"
+        self.assertEqual(self.коллекция.where(статус="доставлен"), [self.заказы[0]])
+
+    def test_load_resets_indexes(self):
+        """Проверяем, что после load индексы и итог описывают загруженные заказы"""
+        self.коллекция.where()
+        with tempfile.TemporaryDirectory() as папка:
+            путь = os.path.join(папка, "orders.json")
+            VectorCollection([заказ(("Суп", 300), статус="доставлен")]).save(путь)
+            self.коллекция.load(путь)
+        self.assertFalse(self.коллекция.indexed)
+        self.assertEqual(len(self.коллекция.where(contains="Суп")), 1)
+        self.assertEqual(self.коллекция.where(contains="Салат"), [])
+        self.assertEqual(self.коллекция(), 300.0)
+        # Прежние заказы больше не сообщают коллекции о смене статуса
+        self.заказы[0].статус = "оплачен"
+        self.assertEqual(self.коллекция.where(статус="оплачен"), [])
+
+    def test_orders_do_not_keep_collection_alive(self):
+        """Проверяем, что заказ, переживший коллекцию, не удерживает её в памяти"""
+        for cls in (Заказ, КомпактныйЗаказ):
+            z = cls([("Чай", 50)])
+            коллекция = VectorCollection([z])
+            коллекция.where()
+            ссылка = weakref.ref(коллекция)
+            del коллекция
+            gc.collect()
+            self.assertIsNone(ссылка())
+            z.статус = "оплачен"  # умершие подписчики просто отбрасываются
+
+
+class TestVectorCollectionAppend(unittest.TestCase):
+    def setUp(self):
+        """Каждый тест работает в своей временной папке"""
+        self.папка = tempfile.TemporaryDirectory()
+        self.путь = os.path.join(self.папка.name, "orders.jsonl")
+        self.коллекция = VectorCollection([заказ(("Салат", 200)), заказ(("Кола", 100))])
+
+    def tearDown(self):
+        self.коллекция.close_append()
+        self.папка.cleanup()
+
+    def строки(self):
+        with open(self.путь, encoding="utf-8") as f:
+            return f.read().splitlines()
+
+    def товары(self):
+        return [[т.наименование for т in z.товары] for z in VectorCollection.iter_load(self.путь)]
+
+    def test_add_and_remove_are_appended(self):
+        """Проверяем, что add дописывает заказ, а remove — надгробие, и iter_load их учитывает"""
+        self.коллекция.open_append(self.путь)
+        self.коллекция.add(заказ(("Суп", 300)))
+        self.коллекция.remove(0)
+        self.assertEqual(len(self.строки()), 4)
+        self.assertEqual(self.строки()[-1], '{"удалён": 0}')
+        self.assertEqual(self.товары(), [["Кола"], ["Суп"]])
+
+    def test_tombstone_refers_to_file_line(self):
+        """Проверяем, что после удаления надгробие следующего заказа указывает на его строку в файле"""
+        self.коллекция.open_append(self.путь)
+        self.коллекция.add(заказ(("Суп", 300)))
+        self.коллекция.remove(0)
+        self.коллекция.remove(1)
+        self.assertEqual(self.товары(), [["Кола"]])
+
+    def test_compact_rewrites_file(self):
+        """Проверяем, что compact убирает из файла надгробия и удалённые заказы"""
+        self.коллекция.open_append(self.путь)
+        self.коллекция.remove(0)
+        self.коллекция.compact()
+        self.assertEqual(len(self.строки()), 1)
+        self.коллекция.add(заказ(("Суп", 300)))
+        self.коллекция.remove(0)
+        self.assertEqual(self.товары(), [["Суп"]])
+
+    def test_compact_without_append_mode(self):
+        """Проверяем, что compact без открытого режима дозаписи сообщает об ошибке"""
+        with self.assertRaisesRegex(ValueError, "дозаписи"):
+            self.коллекция.compact()
+        self.коллекция.open_append(self.путь)
+        self.коллекция.close_append()
+        with self.assertRaisesRegex(ValueError, "дозаписи"):
+            self.коллекция.compact()
+
+    def test_load_during_append_mode(self):
+        """Проверяем, что load в режиме дозаписи переписывает файл загруженными заказами"""
+        другой = os.path.join(self.папка.name, "other.json")
+        VectorCollection([заказ(("Чай", 50))]).save(другой)
+        self.коллекция.open_append(self.путь)
+        self.коллекция.load(другой)
+        self.коллекция.add(заказ(("Суп", 300)))
+        self.коллекция.remove(0)
+        self.assertEqual(self.товары(), [["Суп"]])
+
+
+class TestExtendedVectorCollectionEviction(unittest.TestCase):
+    def setUp(self):
+        """Заказы a..e с возрастающими датами создания"""
+        начало = datetime(2025, 1, 1)
+        self.заказы = {имя: заказ((имя, цена), дата=начало + timedelta(days=день))
+                       for день, (имя, цена) in enumerate([("a", 10), ("b", 20), ("c", 30), ("d", 40), ("e", 50)])}
+        self.вытеснены = []
+
+    def коллекция(self, policy, *имена, **параметры):
+        return ExtendedVectorCollection([self.заказы[и] for и in имена], max_size=3, policy=policy,
+                                        on_evict=self.вытеснены.append, **параметры)
+
+    @staticmethod
+    def имена(коллекция):
+        return [z.товары[0].наименование for z in коллекция.data]
+
+    def test_without_policy_add_raises(self):
+        """Проверяем, что без политики переполнение по-прежнему запрещено"""
+        коллекция = ExtendedVectorCollection([self.заказы[и] for и in "abc"], max_size=3)
+        with self.assertRaisesRegex(ValueError, "максимальный размер"):
+            коллекция.add(self.заказы["d"])
+        self.assertEqual(len(коллекция), 3)
+
+    def test_unknown_policy(self):
+        """Проверяем, что неизвестная политика отвергается"""
+        with self.assertRaises(ValueError):
+            ExtendedVectorCollection(policy="random")
+
+    def test_fifo_replaces_earliest_added(self):
+        """Проверяем, что fifo вытесняет заказы в порядке добавления, занимая их позиции"""
+        коллекция = self.коллекция("fifo", *"abc")
+        коллекция.add(self.заказы["d"])
+        коллекция.add(self.заказы["e"])
+        self.assertEqual(self.имена(коллекция), ["d", "e", "c"])
+        self.assertEqual(self.вытеснены, [self.заказы["a"], self.заказы["b"]])
+        self.assertEqual(коллекция.stats["evictions"], 2)
+
+    def test_lru_keeps_recently_read(self):
+        """Проверяем, что lru вытесняет заказ, к которому дольше всех не обращались"""
+        коллекция = self.коллекция("lru", *"abc")
+        коллекция[0]
+        коллекция.add(self.заказы["d"])
+        self.assertEqual(self.вытеснены, [self.заказы["b"]])
+        self.assertEqual(self.имена(коллекция), ["a", "d", "c"])
+
+    def test_oldest_replaces_earliest_created(self):
+        """Проверяем, что oldest вытесняет заказ с самой ранней датой создания"""
+        коллекция = self.коллекция("oldest", *"cab")
+        коллекция.add(self.заказы["d"])
+        коллекция.add(self.заказы["e"])
+        self.assertEqual(self.вытеснены, [self.заказы["a"], self.заказы["b"]])
+        self.assertEqual(self.имена(коллекция), ["c", "d", "e"])
+
+    def test_fifo_after_remove(self):
+        """Проверяем, что после remove очередь fifo указывает на сдвинутые позиции"""
+        коллекция = self.коллекция("fifo", *"abc")
+        коллекция.remove(0)
+        коллекция.add(self.заказы["d"])
+        коллекция.add(self.заказы["e"])
+        self.assertEqual(self.вытеснены, [self.заказы["b"]])
+        self.assertEqual(self.имена(коллекция), ["e", "c", "d"])
+
+    def test_lru_after_remove(self):
+        """Проверяем, что remove сохраняет порядок обращений у оставшихся заказов"""
+        коллекция = self.коллекция("lru", *"abc")
+        коллекция[1]
+        коллекция[0]
+        коллекция.remove(1)
+        коллекция.add(self.заказы["d"])
+        коллекция.add(self.заказы["e"])
+        self.assertEqual(self.вытеснены, [self.заказы["c"]])
+        self.assertEqual(self.имена(коллекция), ["a", "e", "d"])
+
+    def test_oldest_after_remove(self):
+        """Проверяем, что после remove куча ссылается на верные позиции"""
+        коллекция = self.коллекция("oldest", *"bca")
+        коллекция.remove(0)
+        коллекция.add(self.заказы["e"])
+        коллекция.add(self.заказы["d"])
+        self.assertEqual(self.вытеснены, [self.заказы["a"]])
+        self.assertEqual(self.имена(коллекция), ["c", "d", "e"])
+
+    def test_eviction_keeps_indexes_and_total(self):
+        """Проверяем, что вытеснение обновляет индексы и общую стоимость"""
+        коллекция = self.коллекция("fifo", *"abc")
+        коллекция.where()
+        коллекция.add(self.заказы["d"])
+        self.assertEqual(коллекция.where(contains="a"), [])
+        self.assertEqual(коллекция.where(contains="d"), [self.заказы["d"]])
+        self.assertEqual(коллекция(), 90.0)
+
+    def test_stats(self):
+        """Проверяем счётчики попаданий, промахов и вытеснений"""
+        коллекция = self.коллекция("fifo", *"ab")
+        коллекция[0]
+        коллекция[1]
+        with self.assertRaises(IndexError):
+            коллекция[5]
+        коллекция.add(self.заказы["c"])
+        self.assertEqual(коллекция.stats, {"hits": 2, "misses": 1, "evictions": 0})
+
+    def test_load_resets_policy(self):
+        """Проверяем, что после load очередь вытеснения описывает загруженные заказы"""
+        with tempfile.TemporaryDirectory() as папка:
+            путь = os.path.join(папка, "orders.json")
+            VectorCollection([self.заказы[и] for и in "cde"]).save(путь)
+            коллекция = self.коллекция("fifo", "a")
+            коллекция.load(путь)
+        коллекция.add(self.заказы["a"])
+        self.assertEqual(self.имена(коллекция), ["a", "d", "e"])
+        self.assertEqual(len(self.вытеснены), 1)
+
+
+class TestVectorCollectionView(unittest.TestCase):
+    def setUp(self):
+        """Пять заказов с ценами, которые плохо складываются в двоичной арифметике"""
+        self.заказы = [заказ(("Товар", цена)) for цена in (0.1, 0.2, 0.3, 1e16, 0.7)]
+
+    def коллекции(self):
+        return [VectorCollection(self.заказы), ColumnarVectorCollection(self.заказы)]
+
+    def test_slice_is_view_of_parent(self):
+        """Проверяем, что срез не копирует заказы и видит содержимое родителя"""
+        коллекция = VectorCollection(self.заказы)
+        срез = коллекция[1:4]
+        self.assertIsInstance(срез, VectorCollectionView)
+        self.assertIs(срез.parent, коллекция)
+        self.assertEqual(list(срез), self.заказы[1:4])
+        self.assertIs(срез[0], self.заказы[1])
+        self.assertEqual(list(срез[::-1]), self.заказы[3:0:-1])
+        with self.assertRaises(IndexError):
+            срез[3]
+
+    def test_view_total(self):
+        """Проверяем, что итог среза точен и не зависит от шага"""
+        коллекция = VectorCollection(self.заказы)
+        self.assertEqual(коллекция[1:4](), math.fsum([0.2, 0.3, 1e16]))
+        self.assertEqual(коллекция[::-2](), math.fsum([0.7, 0.3, 0.1]))
+        self.assertEqual(коллекция[3:1](), 0.0)
+
+    def test_columnar_view_total(self):
+        """Проверяем итог среза колоночной коллекции (с NumPy — векторная сумма)"""
+        коллекция = ColumnarVectorCollection(self.заказы)
+        self.assertAlmostEqual(коллекция[1:4](), 0.2 + 0.3 + 1e16, delta=2)
+        self.assertAlmostEqual(коллекция[::-2](), 1.1)
+        self.assertEqual(коллекция[3:1](), 0.0)
+
+    def test_view_invalidated_by_changes(self):
+        """Проверяем, что срез и его подсрезы перестают работать после add, remove и load"""
+        with tempfile.TemporaryDirectory() as папка:
+            путь = os.path.join(папка, "orders.json")
+            VectorCollection(self.заказы[:2]).save(путь)
+            изменения = [lambda к: к.add(заказ(("Суп", 1))), lambda к: к.remove(0), lambda к: к.load(путь)]
+            for коллекция in self.коллекции():
+                for изменить in изменения:
+                    with self.subTest(cls=type(коллекция).__name__):
+                        срез = коллекция[0:2]
+                        подсрез = срез[1:]
+                        изменить(коллекция)
+                        for обращение in (len, list, lambda в: в[0], lambda в: в(), lambda в: в[0:1]):
+                            with self.assertRaises(RuntimeError):
+                                обращение(срез)
+                            with self.assertRaises(RuntimeError):
+                                обращение(подсрез)
+                        self.assertEqual(len(коллекция[0:2]), 2)  # новый срез работает
+
+    def test_eviction_invalidates_view(self):
+        """Проверяем, что вытеснение на месте тоже делает срез устаревшим"""
+        коллекция = ExtendedVectorCollection(self.заказы[:2], max_size=2, policy="fifo")
+        срез = коллекция[:]
+        коллекция.add(заказ(("Суп", 1)))
+        with self.assertRaises(RuntimeError):
+            list(срез)
+
+    def test_iteration_stops_when_parent_changes(self):
+        """Проверяем, что обход среза прерывается, если родитель изменился посреди обхода"""
+        коллекция = VectorCollection(self.заказы)
+        обход = iter(коллекция[:])
+        next(обход)
+        коллекция.remove(0)
+        with self.assertRaises(RuntimeError):
+            next(обход)
+
+    def test_materialize_copies(self):
+        """Проверяем, что materialize создаёт независимую коллекцию того же вида"""
+        for коллекция in self.коллекции():
+            with self.subTest(cls=type(коллекция).__name__):
+                копия = коллекция[1:3].materialize()
+                self.assertIs(type(копия), type(коллекция))
+                коллекция.remove(1)
+                self.assertEqual(len(копия), 2)
+                self.assertEqual(копия(), math.fsum([0.2, 0.3]))
+
+
+class TestVectorCollectionRunningTotal(unittest.TestCase):
+    def test_total_follows_add_and_remove(self):
+        """Проверяем, что итог коллекции — точная сумма оставшихся заказов"""
+        коллекция = VectorCollection([заказ(("Дорогой", 1e16))])
+        for _ in range(1000):
+            коллекция.add(заказ(("Мелочь", 0.1)))
+        for _ in range(500):
+            коллекция.remove(1)
+        self.assertEqual(коллекция(), math.fsum([1e16] + [0.1] * 500))
+        коллекция.remove(0)
+        self.assertAlmostEqual(коллекция(), 50.0, places=9)
+
+    def test_empty_collection_total_is_zero(self):
+        """Проверяем, что после удаления всех заказов итог ровно ноль"""
+        коллекция = VectorCollection([заказ(("Чай", 0.1)), заказ(("Кола", 0.2))])
+        коллекция.remove(0)
+        коллекция.remove(0)
+        self.assertEqual(коллекция(), 0.0)
+
+    def test_replace_and_load_update_total(self):
+        """Проверяем итог после вытеснения на месте и после load"""
+        коллекция = ExtendedVectorCollection([заказ(("Чай", 80))], max_size=1, policy="fifo")
+        коллекция.add(заказ(("Суп", 250)))
+        self.assertEqual(коллекция(), 250.0)
+        with tempfile.TemporaryDirectory() as папка:
+            путь = os.path.join(папка, "orders.json")
+            VectorCollection([заказ(("Кола", 100)), заказ(("Салат", 200.5))]).save(путь)
+            коллекция.load(путь)
+            self.assertEqual(коллекция(), 300.5)
+            коллекция.load(os.path.join(папка, "нет.json"))
+        self.assertEqual(коллекция(), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
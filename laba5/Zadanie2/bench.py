@@ -0,0 +1,313 @@
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+
+import ticket_module
+from ticket_gateway import АсинхронныйШлюз, запустить_сервер
+from ticket_module import (БилетОрганичением, БилетОрганичениемПоездок, TicketDatabase, Действие, ХранилищеИстории,
+                           json_в_бинарный, читать_бинарный, читать_json_массив)
+
+
+def создать_базу(путь, размер_базы, тишина, **параметры):
+    with open(путь, "w", encoding="utf-8") as f:
+        json.dump([БилетОрганичениемПоездок(f"B{i}", 10).to_dict() for i in range(размер_базы)], f, ensure_ascii=False)
+    with redirect_stdout(тишина):
+        return TicketDatabase(путь, **параметры)
+
+
+def замер_журнала(количество=2000, размер_базы=10000):
+    with tempfile.TemporaryDirectory() as папка, open(os.devnull, "w") as тишина:
+        for журнал in (False, True):
+            путь = os.path.join(папка, f"db_{журнал}.json")
+            db = создать_базу(путь, размер_базы, тишина, журнал=журнал, порог_уплотнения=10 ** 9)
+            with redirect_stdout(тишина):
+                шаг = max(1, количество // 20) if not журнал else 1
+                начало = time.perf_counter()
+                выполнено = 0
+                for i in range(0, количество, шаг):
+                    db.добавить_билет(БилетОрганичениемПоездок(f"N{i}", 5))
+                    выполнено += 1
+                прошло = time.perf_counter() - начало
+                db.закрыть()
+            режим = "журнал" if журнал else "полная перезапись"
+            print(f"{режим:>18}: {выполнено / прошло:10.0f} записей/с (база {размер_базы} билетов)")
+
+
+def замер_поиска(количество=100000, размер_базы=100000):
+    with tempfile.TemporaryDirectory() as папка, open(os.devnull, "w") as тишина:
+        db = создать_базу(os.path.join(папка, "db.json"), размер_базы, тишина)
+        номера = [f"B{(i * 7919) % размер_базы}" for i in range(количество)]
+        начало = time.perf_counter()
+        for номер in номера:
+            db.найти_билет(номер)
+        одиночный = time.perf_counter() - начало
+        начало = time.perf_counter()
+        db.найти_билеты(номера)
+        пакетный = time.perf_counter() - начало
+    print(f"найти_билет:  {количество / одиночный:12.0f} поисков/с")
+    print(f"найти_билеты: {количество / пакетный:12.0f} поисков/с")
+
+
+def замер_пакета(количество=20000, размер_базы=20000, размер_пакета=1000):
+    with tempfile.TemporaryDirectory() as папка, open(os.devnull, "w") as тишина:
+        for журнал in (False, True):
+            db = создать_базу(os.path.join(папка, f"db_{журнал}.json"), размер_базы, тишина, журнал=журнал)
+            taps = [(f"B{(i * 7919) % размер_базы}", datetime.now()) for i in range(количество)]
+            начало = time.perf_counter()
+            for i in range(0, количество, размер_пакета):
+                db.списать_пакет(taps[i:i + размер_пакета])
+            прошло = time.perf_counter() - начало
+            db.закрыть()
+            режим = "журнал" if журнал else "полная перезапись"
+            print(f"{режим:>18}: {количество / прошло:10.0f} касаний/с (пакеты по {размер_пакета})")
+
+
+def создать_базу_с_историей(путь, размер_базы, длина_истории):
+    with open(путь, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i in range(размер_базы):
+            билет = БилетОрганичениемПоездок(f"B{i}", длина_истории)
+            for _ in range(длина_истории):
+                билет._списать(datetime.now())
+            f.write(("," if i else "") + json.dumps(билет.to_dict(), ensure_ascii=False, indent=4))
+        f.write("]")
+
+
+def замер_загрузки(размер_базы=20000, длина_истории=20):
+    with tempfile.TemporaryDirectory() as папка, open(os.devnull, "w") as тишина:
+        путь = os.path.join(папка, "db.json")
+        создать_базу_с_историей(путь, размер_базы, длина_истории)
+        for название, разобрать in (("json.load", json.load), ("потоково", читать_json_массив)):
+            tracemalloc.start()
+            начало = time.perf_counter()
+            with open(путь, encoding="utf-8") as f:
+                for _ in разобрать(f):
+                    pass
+            прошло = time.perf_counter() - начало
+            пик = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{название:>10}: разбор {прошло:.2f} с, пик памяти {пик / 2 ** 20:.1f} МиБ")
+        начало = time.perf_counter()
+        with redirect_stdout(тишина):
+            TicketDatabase(путь)
+        print(f"TicketDatabase: загрузка {размер_базы} билетов за {time.perf_counter() - начало:.2f} с")
+
+
+def замер_бинарного(размер_базы=20000, длина_истории=20):
+    # Полный масштаб из задачи: python bench.py бинарный 1000000 20
+    with tempfile.TemporaryDirectory() as папка, open(os.devnull, "w") as тишина:
+        json_путь = os.path.join(папка, "db.json")
+        bin_путь = os.path.join(папка, "db.bin")
+        создать_базу_с_историей(json_путь, размер_базы, длина_истории)
+        json_в_бинарный(json_путь, bin_путь)
+        размеры = {п: os.path.getsize(п) for п in (json_путь, bin_путь)}
+        времена = {}
+        for путь in (json_путь, bin_путь):
+            начало = time.perf_counter()
+            if путь == bin_путь:
+                for item in читать_бинарный(путь):
+                    for _ in item.get("история", ()):
+                        pass
+            else:
+                with open(путь, encoding="utf-8") as f:
+                    for _ in читать_json_массив(f):
+                        pass
+            разбор = time.perf_counter() - начало
+            начало = time.perf_counter()
+            with redirect_stdout(тишина):
+                TicketDatabase(путь)
+            времена[путь] = (разбор, time.perf_counter() - начало)
+        for путь, название in ((json_путь, "JSON"), (bin_путь, "бинарный")):
+            разбор, загрузка = времена[путь]
+            print(f"{название:>9}: {размеры[путь] / 2 ** 20:8.1f} МиБ, разбор с историей {разбор:.2f} с, "
+                  f"TicketDatabase {загрузка:.2f} с")
+        print(f"Выигрыш: размер x{размеры[json_путь] / размеры[bin_путь]:.1f}, "
+              f"разбор x{времена[json_путь][0] / времена[bin_путь][0]:.1f}, "
+              f"загрузка x{времена[json_путь][1] / времена[bin_путь][1]:.1f}")
+
+
+def замер_хранилища(событий=200000, билетов=10000):
+    начало_суток = datetime(2025, 1, 1)
+    шаг = timedelta(days=30) / событий
+    with tempfile.TemporaryDirectory() as папка:
+        tracemalloc.start()
+        списки = {}
+        for i in range(событий):
+            списки.setdefault(f"B{i % билетов}", []).append(
+                Действие("Поездка списана (в пределах срока)", начало_суток + i * шаг))
+        в_памяти = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        хранилище = ХранилищеИстории(os.path.join(папка, "история"))
+        for i in range(событий):
+            хранилище.добавить(f"B{i % билетов}", "Поездка списана (в пределах срока)", начало_суток + i * шаг)
+        на_диске = sum(os.path.getsize(os.path.join(папка, "история", имя))
+                       for имя in os.listdir(os.path.join(папка, "история")))
+        print(f"Память на событие: списки Действие {в_памяти / событий:.0f} Б, столбцы на диске {на_диске / событий:.0f} Б")
+
+        с, по = начало_суток + timedelta(days=10), начало_суток + timedelta(days=11)
+        начало = time.perf_counter()
+        найдено_списками = sum(1 for история in списки.values() for д in история if с <= д.время < по)
+        по_спискам = time.perf_counter() - начало
+        хранилище.столбцы()
+        начало = time.perf_counter()
+        найдено = len(хранилище.по_времени(с, по))
+        по_столбцам = time.perf_counter() - начало
+        print(f"Диапазон по времени: обход списков {по_спискам * 1000:.1f} мс ({найдено_списками}), "
+              f"хранилище {по_столбцам * 1000:.3f} мс ({найдено})")
+        хранилище.закрыть()
+
+
+def замер_турникетов(потоков=8, касаний=20000, билетов=100, журнал=0):
+    # Симулятор турникетов: пул потоков бьёт случайными касаниями по общим билетам.
+    # Потерянные обновления = успешные списания, не отразившиеся на балансе.
+    поездок = касаний * потоков
+    with tempfile.TemporaryDirectory() as папка, open(os.devnull, "w") as тишина:
+        for потокобезопасно in (False, True):
+            путь = os.path.join(папка, f"db_{потокобезопасно}.json")
+            with open(путь, "w", encoding="utf-8") as f:
+                json.dump([БилетОрганичениемПоездок(f"B{i}", поездок).to_dict() for i in range(билетов)], f)
+            with redirect_stdout(тишина):
+                db = TicketDatabase(путь, журнал=bool(журнал), потокобезопасно=потокобезопасно)
+
+            def турникет(зерно):
+                генератор = random.Random(зерно)
+                успешно = 0
+                for _ in range(касаний):
+                    номер = f"B{генератор.randrange(билетов)}"
+                    if потокобезопасно:
+                        успешно += bool(db.списать(номер))
+                    else:
+                        успешно += db.найти_билет(номер)._списать(datetime.now())
+                return успешно
+
+            начало = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=потоков) as пул:
+                успешно = sum(пул.map(турникет, range(потоков)))
+            прошло = time.perf_counter() - начало
+            db.закрыть()
+            списано = sum(поездок - б._баланс for б in db.билеты)
+            режим = "с блокировками" if потокобезопасно else "без блокировок"
+            print(f"{режим:>15}: {потоков * касаний / прошло:10.0f} касаний/с, "
+                  f"потеряно обновлений: {успешно - списано}")
+
+
+async def _нагрузить_шлюз(путь, соединений, запросов, билетов):
+    db = TicketDatabase(путь, журнал=True, групповая_запись=True)
+    шлюз = АсинхронныйШлюз(db)
+    сервер = await запустить_сервер(шлюз, port=0)
+    порт = сервер.sockets[0].getsockname()[1]
+    задержки = []
+
+    async def клиент(зерно):
+        генератор = random.Random(зерно)
+        reader, writer = await asyncio.open_connection("127.0.0.1", порт)
+        for _ in range(запросов):
+            команда = "DEDUCT" if генератор.random() < 0.5 else "VALIDATE"
+            начало = time.perf_counter()
+            writer.write(f"{команда} B{генератор.randrange(билетов)}\n".encode("utf-8"))
+            await reader.readline()
+            задержки.append(time.perf_counter() - начало)
+        writer.close()
+
+    начало = time.perf_counter()
+    await asyncio.gather(*(клиент(i) for i in range(соединений)))
+    прошло = time.perf_counter() - начало
+    сервер.close()
+    await сервер.wait_closed()
+    await шлюз.закрыть()
+    return задержки, прошло, шлюз.сбросов
+
+
+def замер_шлюза(соединений=1000, запросов=20, билетов=10000):
+    # Для 10k соединений поднимите лимит дескрипторов: ulimit -n 65536
+    with tempfile.TemporaryDirectory() as папка, open(os.devnull, "w") as тишина:
+        путь = os.path.join(папка, "db.json")
+        создать_базу(путь, билетов, тишина).закрыть()
+        with redirect_stdout(тишина):
+            задержки, прошло, сбросов = asyncio.run(_нагрузить_шлюз(путь, соединений, запросов, билетов))
+    задержки.sort()
+    p50 = задержки[len(задержки) // 2] * 1000
+    p99 = задержки[int(len(задержки) * 0.99)] * 1000
+    print(f"{соединений} соединений: {len(задержки) / прошло:.0f} запросов/с, "
+          f"p50 {p50:.2f} мс, p99 {p99:.2f} мс, сохранений {сбросов}")
+
+
+def замер_сроков(размер_базы=100000, часов=24):
+    # Полный масштаб из задачи: python bench.py сроки 1000000
+    генератор = random.Random(1)
+    with tempfile.TemporaryDirectory() as папка, open(os.devnull, "w") as тишина:
+        путь = os.path.join(папка, "db.json")
+        with open(путь, "w", encoding="utf-8") as f:
+            f.write("[")
+            for i in range(размер_базы):
+                билет = БилетОрганичением(f"T{i}", генератор.randint(-30, 30))
+                f.write(("," if i else "") + json.dumps(билет.to_dict(), ensure_ascii=False))
+            f.write("]")
+        with redirect_stdout(тишина):
+            db = TicketDatabase(путь, журнал=True, групповая_запись=True)
+        момент = datetime.now()
+        граница = момент + timedelta(hours=часов)
+
+        начало = time.perf_counter()
+        скоро = [б for б in db.билеты if isinstance(б, БилетОрганичением) and момент <= б.срок_действия <= граница]
+        истекли = [б for б in db.билеты if isinstance(б, БилетОрганичением) and not б()]
+        перебор = time.perf_counter() - начало
+
+        начало = time.perf_counter()
+        скоро_по_индексу = db.истекают_в_течение(часов, момент)
+        запрос = time.perf_counter() - начало
+        начало = time.perf_counter()
+        удалено = db.удалить_истёкшие(момент)
+        чистка = time.perf_counter() - начало
+        начало = time.perf_counter()
+        db.закрыть()
+        запись = time.perf_counter() - начало
+    print(f"Полный перебор: {перебор * 1000:.1f} мс ({len(скоро)} скоро истекут, {len(истекли)} истекли)")
+    print(f"Индекс сроков: запрос {запрос * 1000:.2f} мс ({len(скоро_по_индексу)}), "
+          f"удаление истёкших {чистка * 1000:.1f} мс ({len(удалено)}), запись в журнал {запись * 1000:.0f} мс")
+
+
+def замер_событий(количество=200000):
+    # Стоимость касания с разными приёмниками событий (вывод консоли уходит в /dev/null)
+    приёмники = (("без приёмника", ticket_module.ПриёмникСобытий()),
+                 ("консоль", ticket_module.КонсольныйПриёмник()),
+                 ("кольцевой буфер", ticket_module.КольцевойПриёмник()))
+    with open(os.devnull, "w") as тишина, redirect_stdout(тишина):
+        результаты = []
+        for название, приёмник in приёмники:
+            прежний = ticket_module.установить_приёмник(приёмник)
+            билет = БилетОрганичением("T1", 30)
+            начало = time.perf_counter()
+            for _ in range(количество):
+                билет.списать_поездку()
+            результаты.append((название, time.perf_counter() - начало))
+            ticket_module.установить_приёмник(прежний)
+    for название, прошло in результаты:
+        print(f"{название:>16}: {количество / прошло:10.0f} касаний/с")
+
+
+ЗАМЕРЫ = {
+    "журнал": замер_журнала,
+    "поиск": замер_поиска,
+    "пакет": замер_пакета,
+    "загрузка": замер_загрузки,
+    "бинарный": замер_бинарного,
+    "хранилище": замер_хранилища,
+    "турникеты": замер_турникетов,
+    "шлюз": замер_шлюза,
+    "сроки": замер_сроков,
+    "события": замер_событий,
+}
+
+if __name__ == "__main__":
+    # Использование: python bench.py <замер> [параметры...]
+    имя = sys.argv[1] if len(sys.argv) > 1 else "журнал"
+    ЗАМЕРЫ[имя](*(int(a) for a in sys.argv[2:]))
@@ -1,7 +1,10 @@
-from ticket_module import ПроезднойБилет, БилетОрганичением, БилетОрганичениемПоездок, TicketDatabase
+from ticket_module import (ПроезднойБилет, БилетОрганичением, БилетОрганичениемПоездок, TicketDatabase,
+                           КонсольныйПриёмник, установить_приёмник)
 
 def main():
     print("Тестирование классов билетов с базой данных\n")
+    # Сообщения о работе билетов и базы выводим в консоль
+    установить_приёмник(КонсольныйПриёмник())
 
     # Создание базы данных
     db = TicketDatabase()
@@ -0,0 +1,135 @@
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from ticket_module import TicketDatabase
+
+
+# Ожидание, чей вызывающий отменён (разрыв соединения, wait_for), уже завершено:
+# повторное set_result бросило бы InvalidStateError и остановило цикл сброса
+def _завершить(ожидающие, ошибка=None):
+    for ожидание in ожидающие:
+        if ожидание.done():
+            continue
+        if ошибка is None:
+            ожидание.set_result(None)
+        else:
+            ожидание.set_exception(ошибка)
+
+
+# Асинхронный фасад над TicketDatabase. Изменения применяются в памяти сразу,
+# а запись на диск выполняется в отдельном потоке с групповой фиксацией:
+# все вызовы, пришедшие до начала очередного сохранения, ждут одно общее сохранение.
+class АсинхронныйШлюз:
+    def __init__(self, db, executor=None):
+        self.__db = db
+        self.__executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="шлюз-запись")
+        self.__ожидающие = []
+        self.__есть_работа = asyncio.Event()
+        self.__сбросов = 0
+        self.__закрывается = False
+        self.__сброс = asyncio.get_running_loop().create_task(self.__цикл_сброса())
+
+    @property
+    def сбросов(self):
+        return self.__сбросов
+
+    async def validate(self, номер):
+        билет = self.__db.найти_билет(номер)
+        return None if билет is None else билет()
+
+    async def deduct(self, номер):
+        результат = self.__db.списать(номер)
+        if результат:
+            await self.__зафиксировать()
+        return результат
+
+    async def add(self, билет):
+        self.__db.добавить_билет(билет)
+        await self.__зафиксировать()
+
+    async def __зафиксировать(self):
+        ожидание = asyncio.get_running_loop().create_future()
+        self.__ожидающие.append(ожидание)
+        self.__есть_работа.set()
+        await ожидание
+
+    async def __цикл_сброса(self):
+        цикл = asyncio.get_running_loop()
+        while True:
+            await self.__есть_работа.wait()
+            self.__есть_работа.clear()
+            ожидающие, self.__ожидающие = self.__ожидающие, []
+            try:
+                await цикл.run_in_executor(self.__executor, self.__db.сохранить)
+            except Exception as e:
+                _завершить(ожидающие, e)
+            else:
+                self.__сбросов += 1
+                _завершить(ожидающие)
+            if self.__закрывается and not self.__ожидающие:
+                return
+
+    async def закрыть(self):
+        # Цикл не отменяется: он завершает текущее сохранение и разбирает всё, что ждёт.
+        # Вызовы, пришедшие уже после выхода из цикла, подтверждаются последним
+        # сохранением внутри db.закрыть(). Повторное применение журнала после сбоя
+        # исключено номерами записей (LSN) в TicketDatabase
+        self.__закрывается = True
+        self.__есть_работа.set()
+        await self.__сброс
+        ожидающие, self.__ожидающие = self.__ожидающие, []
+        try:
+            await asyncio.get_running_loop().run_in_executor(self.__executor, self.__db.закрыть)
+        except Exception as e:
+            _завершить(ожидающие, e)
+            raise
+        else:
+            _завершить(ожидающие)
+        finally:
+            self.__executor.shutdown()
+
+
+# Простой строковый протокол для стенда: "VALIDATE <номер>" или "DEDUCT <номер>"
+# в запросе, "OK 1", "OK 0", "NOTFOUND" или "ERR <текст>" в ответе
+async def обработать_соединение(шлюз, reader, writer):
+    try:
+        while строка := await reader.readline():
+            команда, _, номер = строка.decode("utf-8").strip().partition(" ")
+            if команда == "VALIDATE":
+                результат = await шлюз.validate(номер)
+            elif команда == "DEDUCT":
+                результат = await шлюз.deduct(номер)
+            else:
+                writer.write(f"ERR неизвестная команда {команда}\n".encode("utf-8"))
+                continue
+            ответ = "NOTFOUND" if результат is None else f"OK {int(результат)}"
+            writer.write(f"{ответ}\n".encode("utf-8"))
+            await writer.drain()
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def запустить_сервер(шлюз, host="127.0.0.1", port=8765, path=None):
+    обработчик = lambda r, w: обработать_соединение(шлюз, r, w)
+    if path:
+        return await asyncio.start_unix_server(обработчик, path=path, backlog=4096)
+    return await asyncio.start_server(обработчик, host, port, backlog=4096)
+
+
+async def main(filename="tickets_db.json", port=8765):
+    db = TicketDatabase(filename, журнал=True, групповая_запись=True)
+    шлюз = АсинхронныйШлюз(db)
+    сервер = await запустить_сервер(шлюз, port=port)
+    print(f"Шлюз билетов слушает порт {port}")
+    try:
+        async with сервер:
+            await сервер.serve_forever()
+    finally:
+        await шлюз.закрыть()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(*sys.argv[1:2], *(int(a) for a in sys.argv[2:3])))
@@ -0,0 +1,47 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+from ticket_gateway import АсинхронныйШлюз
+from ticket_module import TicketDatabase, БилетОрганичениемПоездок
+
+
+class TestAsyncGateway(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        """Шлюз над базой с журналом и групповой записью во временной папке"""
+        self.папка = tempfile.TemporaryDirectory()
+        self.база = os.path.join(self.папка.name, "db.json")
+        self.шлюз = АсинхронныйШлюз(TicketDatabase(self.база, журнал=True, групповая_запись=True))
+        await self.шлюз.add(БилетОрганичениемПоездок("1", 100))
+
+    async def asyncTearDown(self):
+        self.папка.cleanup()
+
+    async def test_cancelled_caller_does_not_stop_flushing(self):
+        """Проверяем, что отменённый вызов не останавливает цикл сброса и следующие вызовы завершаются"""
+        отменяемый = asyncio.create_task(self.шлюз.deduct("1"))
+        await asyncio.sleep(0)
+        отменяемый.cancel()
+        for _ in range(3):
+            self.assertTrue(await asyncio.wait_for(self.шлюз.deduct("1"), timeout=5))
+        await self.шлюз.закрыть()
+
+        db = TicketDatabase(self.база, журнал=True)
+        self.assertEqual(db.найти_билет("1").количество_поездок, 96)
+        db.закрыть()
+
+    async def test_close_resolves_pending_calls(self):
+        """Проверяем, что закрытие дожидается сохранения всех ожидающих вызовов"""
+        вызовы = [asyncio.create_task(self.шлюз.deduct("1")) for _ in range(20)]
+        await asyncio.sleep(0)
+        await self.шлюз.закрыть()
+        self.assertEqual(await asyncio.gather(*вызовы), [True] * 20)
+
+        db = TicketDatabase(self.база, журнал=True)
+        self.assertEqual(db.найти_билет("1").количество_поездок, 80)
+        db.закрыть()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,8 +1,150 @@
 from abc import ABC, abstractmethod
+import array
+import bisect
+import itertools
 import json
+import logging
+import mmap
 import os
+import struct
+import threading
+import time
+from collections import deque
 from datetime import datetime, timedelta
 
+
+# Приёмники событий. Методы билетов и базы сообщают о событиях только если
+# приёмник активен, поэтому без слушателя строки вообще не форматируются.
+ШАБЛОНЫ_СОБЫТИЙ = {
+    "проездной_списан": "Билет №{номер}: Поездка списана. Проезд неограничен.",
+    "проездной_неактивен": "Билет №{номер}: Проездной неактивен.",
+    "проездной_деактивирован": "Билет №{номер}: Деактивирован.",
+    "срок_списан": "Билет №{номер}: Поездка списана. Срок действия до {срок:%Y-%m-%d}",
+    "срок_истёк": "Билет №{номер}: Срок действия истёк ({срок:%Y-%m-%d})",
+    "статус": "Билет №{номер}: Статус - {статус}",
+    "поездка_списана": "Билет №{номер}: Поездка списана. Осталось {осталось} поездок.",
+    "поездки_закончились": "Билет №{номер}: Поездки закончились.",
+    "баланс_обновлён": "Билет №{номер}: Баланс обновлён до {баланс} поездок.",
+    "база_загружена": "База данных загружена из {файл}",
+    "ошибка_загрузки": "Ошибка загрузки базы данных: {ошибка}",
+    "база_создана": "Создана новая база данных: {файл}",
+    "база_сохранена": "База данных сохранена в {файл}",
+    "журнал_воспроизведён": "Журнал {файл}: воспроизведено {записей} записей",
+    "билет_добавлен": "Билет №{номер} добавлен в базу данных",
+    "билет_удалён": "Билет №{номер} удалён из базы данных",
+    "билет_не_найден": "Билет №{номер} не найден",
+}
+
+
+class ПриёмникСобытий:
+    # Приёмник по умолчанию: ничего не делает
+    активен = False
+
+    def событие(self, имя, **поля):
+        pass
+
+
+class КонсольныйПриёмник(ПриёмникСобытий):
+    активен = True
+
+    def событие(self, имя, **поля):
+        print(ШАБЛОНЫ_СОБЫТИЙ[имя].format(**поля))
+
+
+class БуферныйПриёмник(ПриёмникСобытий):
+    # Структурированные записи (время, имя, поля) копятся в списке
+    активен = True
+
+    def __init__(self):
+        self.записи = []
+
+    def событие(self, имя, **поля):
+        self.записи.append((time.time(), имя, поля))
+
+
+class КольцевойПриёмник(БуферныйПриёмник):
+    # Хранит только последние ёмкость записей
+    def __init__(self, ёмкость=1000):
+        self.записи = deque(maxlen=ёмкость)
+
+
+class ЛоггингПриёмник(ПриёмникСобытий):
+    # Адаптер к logging: строка собирается, только если уровень включён
+    активен = True
+
+    def __init__(self, логгер=None, уровень=logging.INFO):
+        self.__логгер = логгер or logging.getLogger("ticket_module")
+        self.__уровень = уровень
+
+    def событие(self, имя, **поля):
+        if self.__логгер.isEnabledFor(self.__уровень):
+            self.__логгер.log(self.__уровень, ШАБЛОНЫ_СОБЫТИЙ[имя].format(**поля), extra={"событие": имя, "поля": поля})
+
+
+_приёмник = ПриёмникСобытий()
+
+
+def установить_приёмник(приёмник):
+    # Возвращает прежний приёмник, чтобы его можно было вернуть
+    global _приёмник
+    прежний, _приёмник = _приёмник, приёмник or ПриёмникСобытий()
+    return прежний
+
+# Реестр типов билетов: имя класса -> класс (заполняется декоратором)
+РЕЕСТР_ТИПОВ = {}
+
+
+def зарегистрировать_тип(cls):
+    РЕЕСТР_ТИПОВ[cls.__name__] = cls
+    return cls
+
+
+# Потоковое чтение JSON-массива: объекты разбираются по одному,
+# поэтому в памяти одновременно находится не больше одного билета
+def читать_json_массив(f, размер_блока=1 << 16):
+    декодер = json.JSONDecoder()
+    буфер = f.read(размер_блока).lstrip()
+    if not буфер.startswith("["):
+        raise ValueError("Ожидался JSON-массив")
+    позиция = 1
+    конец_файла = False
+    while True:
+        while позиция < len(буфер) and буфер[позиция] in " \t\r\n,":
+            позиция += 1
+        if позиция < len(буфер) and буфер[позиция] == "]":
+            return
+        try:
+            объект, позиция = декодер.raw_decode(буфер, позиция)
+        except json.JSONDecodeError:
+            if конец_файла:
+                raise
+            блок = f.read(размер_блока)
+            конец_файла = not блок
+            буфер = буфер[позиция:] + блок
+            позиция = 0
+            continue
+        yield объект
+
+
+# Даты в словарях билетов могут быть ISO-строкой (JSON) или целым числом
+# микросекунд от эпохи (бинарный снимок)
+ЭПОХА = datetime(1970, 1, 1)
+МИКРОСЕКУНДА = timedelta(microseconds=1)
+
+
+def в_микросекунды(значение):
+    if isinstance(значение, int):
+        return значение
+    if isinstance(значение, str):
+        значение = datetime.fromisoformat(значение)
+    return (значение - ЭПОХА) // МИКРОСЕКУНДА
+
+
+def в_дату(значение):
+    if isinstance(значение, int):
+        return ЭПОХА + timedelta(microseconds=значение)
+    return datetime.fromisoformat(значение)
+
 # Класс для композиции: Действие (логирование списания)
 class Действие:
     def __init__(self, описание, время):
@@ -25,7 +167,7 @@ class Действие:
 
     @classmethod
     def from_dict(cls, data):
-        return cls(data["описание"], datetime.fromisoformat(data["время"]))
+        return cls(data["описание"], в_дату(data["время"]))
 
 # Абстрактный базовый класс
 class Билет(ABC):
@@ -33,6 +175,10 @@ class Билет(ABC):
         self.__номер = номер
         self.__дата_активации = datetime.now()
         self.__история = []
+        # История из файла хранится сырыми записями до первого обращения
+        self.__сырая_история = None
+        # Внешнее хранилище истории (ХранилищеИстории), если билет в нём ведётся
+        self.__хранилище = None
         self._баланс = 0
 
     @property
@@ -45,12 +191,31 @@ class Билет(ABC):
 
     @property
     def история(self):
+        if self.__хранилище is not None:
+            return ИсторияБилета(self.__хранилище, self.__номер)
+        if self.__сырая_история is not None:
+            self.__история = [Действие.from_dict(d) for d in self.__сырая_история]
+            self.__сырая_история = None
         return self.__история
 
+    def _подключить_хранилище(self, хранилище):
+        # Накопленная в памяти история переносится в хранилище один раз
+        if self.__хранилище is хранилище:
+            return
+        for действие in self.история:
+            хранилище.добавить(self.__номер, действие.описание, действие.время)
+        self.__история = []
+        self.__хранилище = хранилище
+
     @abstractmethod
     def списать_поездку(self):
         pass
 
+    @abstractmethod
+    def _списать(self, время):
+        # Списание без вывода в консоль; используется пакетной обработкой базы
+        pass
+
     def __str__(self):
         return f"Билет №{self.__номер}, активирован: {self.__дата_активации.strftime('%Y-%m-%d %H:%M')}"
 
@@ -59,28 +224,40 @@ class Билет(ABC):
             "тип": self.__class__.__name__,
             "номер": self.__номер,
             "дата_активации": self.__дата_активации.isoformat(),
-            "история": [d.to_dict() for d in self.__история],
+            # При подключённом хранилище история живёт в нём, а не в снимке
+            "история": ([] if self.__хранилище is not None
+                         else list(self.__сырая_история) if self.__сырая_история is not None
+                         else [d.to_dict() for d in self.__история]),
             "баланс": self._баланс
         }
 
 # Наследуемый класс: ПроезднойБилет
+@зарегистрировать_тип
 class ПроезднойБилет(Билет):
     def __init__(self, номер):
         super().__init__(номер)
         self.__активен = True
 
-    def списать_поездку(self):
+    def _списать(self, время):
         if self.__активен:
-            self.__история.append(Действие("Поездка списана (неограниченный проезд)", datetime.now()))
-            print(f"Билет №{self.номер}: Поездка списана. Проезд неограничен.")
+            self.история.append(Действие("Поездка списана (неограниченный проезд)", время))
+            return True
+        return False
+
+    def списать_поездку(self):
+        if self._списать(datetime.now()):
+            if _приёмник.активен:
+                _приёмник.событие("проездной_списан", номер=self.номер)
             return True
-        print(f"Билет №{self.номер}: Проездной неактивен.")
+        if _приёмник.активен:
+            _приёмник.событие("проездной_неактивен", номер=self.номер)
         return False
 
     def деактивировать(self):
         self.__активен = False
-        self.__история.append(Действие("Проездной деактивирован", datetime.now()))
-        print(f"Билет №{self.номер}: Деактивирован.")
+        self.история.append(Действие("Проездной деактивирован", datetime.now()))
+        if _приёмник.активен:
+            _приёмник.событие("проездной_деактивирован", номер=self.номер)
 
     def __call__(self):
         return self.__активен
@@ -93,13 +270,14 @@ class ПроезднойБилет(Билет):
     @classmethod
     def from_dict(cls, data):
         билет = cls(data["номер"])
-        билет._Билет__дата_активации = datetime.fromisoformat(data["дата_активации"])
-        билет._Билет__история = [Действие.from_dict(d) for d in data["история"]]
+        билет._Билет__дата_активации = в_дату(data["дата_активации"])
+        билет._Билет__сырая_история = data["история"]
         билет._баланс = data["баланс"]
         билет.__активен = data["активен"]
         return билет
 
 # Наследуемый класс: БилетОрганичением
+@зарегистрировать_тип
 class БилетОрганичением(Билет):
     def __init__(self, номер, срок_действия_дней):
         super().__init__(номер)
@@ -110,17 +288,25 @@ class БилетОрганичением(Билет):
     def срок_действия(self):
         return self.__срок_действия
 
+    def _списать(self, время):
+        if время <= self.__срок_действия:
+            self.история.append(Действие("Поездка списана (в пределах срока)", время))
+            return True
+        return False
+
     def списать_поездку(self):
-        if datetime.now() <= self.__срок_действия:
-            self.__история.append(Действие("Поездка списана (в пределах срока)", datetime.now()))
-            print(f"Билет №{self.номер}: Поездка списана. Срок действия до {self.__срок_действия.strftime('%Y-%m-%d')}")
+        if self._списать(datetime.now()):
+            if _приёмник.активен:
+                _приёмник.событие("срок_списан", номер=self.номер, срок=self.__срок_действия)
             return True
-        print(f"Билет №{self.номер}: Срок действия истёк ({self.__срок_действия.strftime('%Y-%m-%d')})")
+        if _приёмник.активен:
+            _приёмник.событие("срок_истёк", номер=self.номер, срок=self.__срок_действия)
         return False
 
     def проверить_статус(self):
         status = "Активен" if datetime.now() <= self.__срок_действия else "Истёк"
-        print(f"Билет №{self.номер}: Статус - {status}")
+        if _приёмник.активен:
+            _приёмник.событие("статус", номер=self.номер, статус=status)
         return status
 
     def __call__(self):
@@ -135,13 +321,14 @@ class БилетОрганичением(Билет):
     def from_dict(cls, data):
         # Создаём объект с нулевым сроком, так как срок_действия будет установлен ниже
         билет = cls(data["номер"], 0)
-        билет._Билет__дата_активации = datetime.fromisoformat(data["дата_активации"])
-        билет._БилетОрганичением__срок_действия = datetime.fromisoformat(data["срок_действия"])
-        билет._Билет__история = [Действие.from_dict(d) for d in data["история"]]
+        билет._Билет__дата_активации = в_дату(data["дата_активации"])
+        билет._БилетОрганичением__срок_действия = в_дату(data["срок_действия"])
+        билет._Билет__сырая_история = data["история"]
         билет._баланс = data["баланс"]
         return билет
 
 # Наследуемый класс: БилетОрганичениемПоездок
+@зарегистрировать_тип
 class БилетОрганичениемПоездок(Билет):
     def __init__(self, номер, количество_поездок):
         super().__init__(номер)
@@ -152,22 +339,30 @@ class БилетОрганичениемПоездок(Билет):
     def количество_поездок(self):
         return self.__количество_поездок
 
-    def списать_поездку(self):
+    def _списать(self, время):
         if self._баланс > 0:
             self._баланс -= 1
             self.__количество_поездок -= 1
-            self.__история.append(Действие(f"Поездка списана, осталось {self._баланс}", datetime.now()))
-            print(f"Билет №{self.номер}: Поездка списана. Осталось {self._баланс} поездок.")
+            self.история.append(Действие(f"Поездка списана, осталось {self._баланс}", время))
+            return True
+        return False
+
+    def списать_поездку(self):
+        if self._списать(datetime.now()):
+            if _приёмник.активен:
+                _приёмник.событие("поездка_списана", номер=self.номер, осталось=self._баланс)
             return True
-        print(f"Билет №{self.номер}: Поездки закончились.")
+        if _приёмник.активен:
+            _приёмник.событие("поездки_закончились", номер=self.номер)
         return False
 
     def обновить_баланс(self, value):
         if value >= 0:
             self._баланс = value
             self.__количество_поездок = value
-            self.__история.append(Действие(f"Баланс обновлён до {value}", datetime.now()))
-            print(f"Билет №{self.номер}: Баланс обновлён до {value} поездок.")
+            self.история.append(Действие(f"Баланс обновлён до {value}", datetime.now()))
+            if _приёмник.активен:
+                _приёмник.событие("баланс_обновлён", номер=self.номер, баланс=value)
         else:
             raise ValueError("Баланс не может быть отрицательным")
 
@@ -185,75 +380,762 @@ class БилетОрганичениемПоездок(Билет):
     @classmethod
     def from_dict(cls, data):
         билет = cls(data["номер"], data["количество_поездок"])
-        билет._Билет__дата_активации = datetime.fromisoformat(data["дата_активации"])
-        билет._Билет__история = [Действие.from_dict(d) for d in data["история"]]
+        билет._Билет__дата_активации = в_дату(data["дата_активации"])
+        билет._Билет__сырая_история = data["история"]
         билет._баланс = data["баланс"]
         билет.__количество_поездок = data["количество_поездок"]
         return билет
 
+# Бинарный снимок базы:
+#   заголовок  <4sHIQ: сигнатура, версия, число билетов, смещение таблицы строк;
+#              с версии 2 за ним <QQ: номер последней учтённой записи журнала (LSN)
+#              и число событий в ХранилищеИстории на момент снимка
+#   билет      <BBBHqqiiI: код типа, флаги полей, активен, длина номера, дата активации,
+#              срок действия, баланс, количество поездок, длина истории;
+#              затем номер (UTF-8) и записи истории <qI: время, код описания
+#   в конце    таблицы типов и описаний (строки интернированы, в записях только коды)
+# LSN снимка передаётся словарём-меткой {"тип": МЕТКА_СНИМКА, ...} первым в потоке словарей.
+СИГНАТУРА = b"TKDB"
+ВЕРСИЯ_ФОРМАТА = 2
+МЕТКА_СНИМКА = "_снимок"
+_ЗАГОЛОВОК = struct.Struct("<4sHIQ")
+_ОТМЕТКИ = struct.Struct("<QQ")
+_ЗАПИСЬ = struct.Struct("<BBBHqqiiI")
+_СОБЫТИЕ = struct.Struct("<qI")
+_ЕСТЬ_АКТИВЕН, _ЕСТЬ_СРОК, _ЕСТЬ_КОЛИЧЕСТВО = 1, 2, 4
+
+
+class _ИсторияИзБлока:
+    # Сырая история из бинарного снимка: байты разбираются только при обращении
+    def __init__(self, блок, описания):
+        self.__блок = блок
+        self.__описания = описания
+
+    def __len__(self):
+        return len(self.__блок) // _СОБЫТИЕ.size
+
+    def __iter__(self):
+        for время, код in _СОБЫТИЕ.iter_unpack(self.__блок):
+            yield {"описание": self.__описания[код], "время": время}
+
+
+def _записать_строки(f, строки):
+    f.write(struct.pack("<I", len(строки)))
+    for строка in строки:
+        данные = строка.encode("utf-8")
+        f.write(struct.pack("<H", len(данные)) + данные)
+
+
+def _читать_строки(f):
+    (количество,) = struct.unpack("<I", f.read(4))
+    строки = []
+    for _ in range(количество):
+        (длина,) = struct.unpack("<H", f.read(2))
+        строки.append(f.read(длина).decode("utf-8"))
+    return строки
+
+
+def записать_бинарный(путь, словари):
+    типы, описания = {}, {}
+    количество = 0
+    метка = {}
+    with open(путь, "wb") as f:
+        f.write(_ЗАГОЛОВОК.pack(СИГНАТУРА, ВЕРСИЯ_ФОРМАТА, 0, 0))
+        f.write(_ОТМЕТКИ.pack(0, 0))
+        for item in словари:
+            if item["тип"] == МЕТКА_СНИМКА:
+                метка = item
+                continue
+            флаги = 0
+            if "активен" in item:
+                флаги |= _ЕСТЬ_АКТИВЕН
+            if "срок_действия" in item:
+                флаги |= _ЕСТЬ_СРОК
+            if "количество_поездок" in item:
+                флаги |= _ЕСТЬ_КОЛИЧЕСТВО
+            номер = str(item["номер"]).encode("utf-8")
+            история = bytearray()
+            for d in item["история"]:
+                код = описания.setdefault(d["описание"], len(описания))
+                история += _СОБЫТИЕ.pack(в_микросекунды(d["время"]), код)
+            f.write(_ЗАПИСЬ.pack(
+                типы.setdefault(item["тип"], len(типы)),
+                флаги,
+                bool(item.get("активен")),
+                len(номер),
+                в_микросекунды(item["дата_активации"]),
+                в_микросекунды(item["срок_действия"]) if флаги & _ЕСТЬ_СРОК else 0,
+                item["баланс"],
+                item.get("количество_поездок", 0),
+                len(история) // _СОБЫТИЕ.size,
+            ))
+            f.write(номер)
+            f.write(история)
+            количество += 1
+        смещение = f.tell()
+        _записать_строки(f, list(типы))
+        _записать_строки(f, list(описания))
+        f.seek(0)
+        f.write(_ЗАГОЛОВОК.pack(СИГНАТУРА, ВЕРСИЯ_ФОРМАТА, количество, смещение))
+        f.write(_ОТМЕТКИ.pack(метка.get("lsn", 0), метка.get("событий", 0)))
+
+
+def читать_бинарный(путь):
+    # Генератор словарей билетов; даты в них — микросекунды от эпохи
+    with open(путь, "rb") as f:
+        сигнатура, версия, количество, смещение = _ЗАГОЛОВОК.unpack(f.read(_ЗАГОЛОВОК.size))
+        if сигнатура != СИГНАТУРА or версия not in (1, ВЕРСИЯ_ФОРМАТА):
+            raise ValueError(f"{путь}: неизвестный формат бинарного снимка")
+        if версия >= 2:
+            lsn, событий = _ОТМЕТКИ.unpack(f.read(_ОТМЕТКИ.size))
+            yield {"тип": МЕТКА_СНИМКА, "lsn": lsn, "событий": событий}
+        начало = f.tell()
+        f.seek(смещение)
+        типы = _читать_строки(f)
+        описания = _читать_строки(f)
+        f.seek(начало)
+        for _ in range(количество):
+            (код_типа, флаги, активен, длина_номера, дата, срок,
+             баланс, поездок, событий) = _ЗАПИСЬ.unpack(f.read(_ЗАПИСЬ.size))
+            item = {
+                "тип": типы[код_типа],
+                "номер": f.read(длина_номера).decode("utf-8"),
+                "дата_активации": дата,
+                "история": _ИсторияИзБлока(f.read(событий * _СОБЫТИЕ.size), описания),
+                "баланс": баланс,
+            }
+            if флаги & _ЕСТЬ_АКТИВЕН:
+                item["активен"] = bool(активен)
+            if флаги & _ЕСТЬ_СРОК:
+                item["срок_действия"] = срок
+            if флаги & _ЕСТЬ_КОЛИЧЕСТВО:
+                item["количество_поездок"] = поездок
+            yield item
+
+
+def json_в_бинарный(json_путь, бинарный_путь):
+    with open(json_путь, "r", encoding="utf-8") as f:
+        записать_бинарный(бинарный_путь, читать_json_массив(f))
+
+
+def бинарный_в_json(бинарный_путь, json_путь):
+    with open(json_путь, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i, item in enumerate(читать_бинарный(бинарный_путь)):
+            if item["тип"] == МЕТКА_СНИМКА:
+                f.write(("," if i else "") + "\n" + json.dumps(item, ensure_ascii=False))
+                continue
+            for поле in ("дата_активации", "срок_действия"):
+                if поле in item:
+                    item[поле] = в_дату(item[поле]).isoformat()
+            item["история"] = [Действие.from_dict(d).to_dict() for d in item["история"]]
+            f.write(("," if i else "") + "\n" + json.dumps(item, ensure_ascii=False))
+        f.write("\n]")
+
+
+# Колоночное хранилище истории поездок: три файла-столбца фиксированной ширины
+# (номер билета, код события, время в микросекундах), читаемые через mmap.
+# Номера билетов и описания событий интернированы в текстовых словарях рядом.
+# Столбцы буферизуются по отдельности, и после сбоя их длины могут разойтись,
+# поэтому при открытии все столбцы обрезаются до самого короткого.
+class ХранилищеИстории:
+    _СТОЛБЦЫ = (("билеты", "I"), ("коды", "H"), ("время", "q"))
+
+    def __init__(self, папка):
+        os.makedirs(папка, exist_ok=True)
+        self.__папка = папка
+        self.__замок = threading.Lock()
+        self.__номера = self.__читать_словарь("номера.txt")
+        self.__описания = self.__читать_словарь("описания.txt")
+        self.__код_номера = {н: i for i, н in enumerate(self.__номера)}
+        self.__код_описания = {о: i for i, о in enumerate(self.__описания)}
+        self.__всего = self.__выровнять_столбцы()
+        self.__файлы = {имя: open(self.__путь(f"{имя}.{тип}"), "ab") for имя, тип in self._СТОЛБЦЫ}
+        self.__словари = {имя: open(self.__путь(имя), "a", encoding="utf-8") for имя in ("номера.txt", "описания.txt")}
+        self.__столбцы = {}
+        self.__отображено = -1
+        self.__обновить()
+        время = self.__столбцы["время"]
+        self.__упорядочено = all(время[i] <= время[i + 1] for i in range(len(время) - 1))
+        self.__последнее_время = время[-1] if len(время) else 0
+        self.__перестановка = None
+        self.__известные = None
+        # Позиции событий каждого билета: код номера -> array("Q")
+        self.__по_билетам = {}
+        for позиция, код in enumerate(self.__столбцы["билеты"]):
+            self.__позиции(код).append(позиция)
+
+    def __путь(self, имя):
+        return os.path.join(self.__папка, имя)
+
+    def __выровнять_столбцы(self):
+        # Событий столько, сколько целых значений в самом коротком столбце
+        размеры = {}
+        for имя, тип in self._СТОЛБЦЫ:
+            путь = self.__путь(f"{имя}.{тип}")
+            размеры[имя] = os.path.getsize(путь) if os.path.exists(путь) else 0
+        всего = min(размеры[имя] // struct.calcsize(тип) for имя, тип in self._СТОЛБЦЫ)
+        for имя, тип in self._СТОЛБЦЫ:
+            if размеры[имя] > всего * struct.calcsize(тип):
+                with open(self.__путь(f"{имя}.{тип}"), "r+b") as f:
+                    f.truncate(всего * struct.calcsize(тип))
+        return всего
+
+    def __читать_словарь(self, имя):
+        if not os.path.exists(self.__путь(имя)):
+            return []
+        with open(self.__путь(имя), encoding="utf-8") as f:
+            return [строка.rstrip("\n") for строка in f]
+
+    def __позиции(self, код):
+        позиции = self.__по_билетам.get(код)
+        if позиции is None:
+            позиции = self.__по_билетам[код] = array.array("Q")
+        return позиции
+
+    def __обновить(self):
+        # Переотображаем файлы, только если с прошлого раза появились новые события
+        if self.__отображено == self.__всего:
+            return
+        for f in self.__файлы.values():
+            f.flush()
+        for имя, тип in self._СТОЛБЦЫ:
+            путь = self.__путь(f"{имя}.{тип}")
+            if os.path.getsize(путь) == 0:
+                self.__столбцы[имя] = memoryview(b"").cast(тип)
+                continue
+            with open(путь, "rb") as f:
+                отображение = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.__столбцы[имя] = memoryview(отображение).cast(тип)
+        self.__отображено = self.__всего
+
+    def __len__(self):
+        return self.__всего
+
+    def столбцы(self):
+        # Столбцы (билеты, коды, время) как memoryview поверх mmap — без копирования
+        self.__обновить()
+        return self.__столбцы["билеты"], self.__столбцы["коды"], self.__столбцы["время"]
+
+    def добавить(self, номер, описание, время):
+        with self.__замок:
+            self.__добавить(номер, описание, время)
+
+    def начать_воспроизведение(self, начало=0):
+        # Пока журнал базы воспроизводится, события, уже попавшие в хранилище, не дублируются.
+        # начало — число событий на момент снимка базы: более ранние события принадлежат
+        # записям, учтённым снимком, и повторно не придут, поэтому сверяется только хвост
+        # после снимка — его размер ограничен журналом, а не всей историей
+        билеты, коды, время = self.столбцы()
+        self.__известные = set(zip(билеты[начало:], коды[начало:], время[начало:]))
+
+    def закончить_воспроизведение(self):
+        self.__известные = None
+
+    def __добавить(self, номер, описание, время):
+        код_номера = self.__код_номера.get(номер)
+        if код_номера is None:
+            код_номера = self.__код_номера[номер] = len(self.__номера)
+            self.__номера.append(номер)
+            self.__словари["номера.txt"].write(f"{номер}\n")
+            self.__словари["номера.txt"].flush()
+        код = self.__код_описания.get(описание)
+        if код is None:
+            код = self.__код_описания[описание] = len(self.__описания)
+            self.__описания.append(описание)
+            self.__словари["описания.txt"].write(f"{описание}\n")
+            self.__словари["описания.txt"].flush()
+        мкс = в_микросекунды(время)
+        if self.__известные is not None and (код_номера, код, мкс) in self.__известные:
+            return
+        if мкс < self.__последнее_время:
+            self.__упорядочено = False
+        self.__последнее_время = мкс
+        self.__файлы["билеты"].write(struct.pack("<I", код_номера))
+        self.__файлы["коды"].write(struct.pack("<H", код))
+        self.__файлы["время"].write(struct.pack("<q", мкс))
+        self.__позиции(код_номера).append(self.__всего)
+        self.__всего += 1
+        self.__перестановка = None
+
+    def действие(self, позиция):
+        self.__обновить()
+        return Действие(self.__описания[self.__столбцы["коды"][позиция]],
+                        в_дату(self.__столбцы["время"][позиция]))
+
+    def позиции_билета(self, номер):
+        код = self.__код_номера.get(номер)
+        return self.__по_билетам.get(код, array.array("Q")) if код is not None else array.array("Q")
+
+    def по_времени(self, с, по):
+        # Позиции событий с <= время < по. Если время в журнале неубывающее
+        # (обычный случай дозаписи), это range по столбцу без копирования.
+        время = self.столбцы()[2]
+        с, по = в_микросекунды(с), в_микросекунды(по)
+        if self.__упорядочено:
+            return range(bisect.bisect_left(время, с), bisect.bisect_left(время, по))
+        if self.__перестановка is None:
+            self.__перестановка = array.array("Q", sorted(range(len(время)), key=время.__getitem__))
+        п = self.__перестановка
+        return п[bisect.bisect_left(п, с, key=время.__getitem__):bisect.bisect_left(п, по, key=время.__getitem__)]
+
+    def номер(self, позиция):
+        self.__обновить()
+        return self.__номера[self.__столбцы["билеты"][позиция]]
+
+    def сбросить(self, fsync=False):
+        with self.__замок:
+            for f in self.__файлы.values():
+                f.flush()
+                if fsync:
+                    os.fsync(f.fileno())
+
+    def закрыть(self):
+        for f in list(self.__файлы.values()) + list(self.__словари.values()):
+            f.close()
+
+
+def _fsync_папки(путь):
+    # На Windows папку нельзя открыть как файл — там переименование не требует этого шага
+    if os.name != "posix":
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(путь)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# Ленивое представление истории одного билета поверх ХранилищеИстории
+class ИсторияБилета:
+    def __init__(self, хранилище, номер):
+        self.__хранилище = хранилище
+        self.__номер = номер
+
+    def __len__(self):
+        return len(self.__хранилище.позиции_билета(self.__номер))
+
+    def __getitem__(self, индекс):
+        позиции = self.__хранилище.позиции_билета(self.__номер)
+        if isinstance(индекс, slice):
+            return [self.__хранилище.действие(п) for п in позиции[индекс]]
+        return self.__хранилище.действие(позиции[индекс])
+
+    def __iter__(self):
+        for позиция in self.__хранилище.позиции_билета(self.__номер):
+            yield self.__хранилище.действие(позиция)
+
+    def append(self, действие):
+        self.__хранилище.добавить(self.__номер, действие.описание, действие.время)
+
+
 # Класс для управления базой данных билетов
+# Режим журнала: изменения дописываются в журнал (filename + ".journal") по одной
+# JSON-строке на операцию, а снимок (filename) переписывается только при уплотнении.
+# Снимок с расширением .bin хранится в бинарном формате (см. записать_бинарный).
+# хранилище_истории — папка ХранилищеИстории; история билетов тогда ведётся в ней.
+# Потокобезопасный режим: списания сериализуются полосатыми блокировками по номеру
+# билета, а сохранение выполняет один фоновый поток, объединяющий запросы.
+# Групповая запись: изменения только копятся, на диск их сбрасывает вызов сохранить().
+#
+# Каждая запись журнала получает возрастающий номер (LSN) в момент применения изменения
+# в памяти, а снимок хранит LSN, на котором он снят. При воспроизведении записи с LSN
+# не больше LSN снимка пропускаются: списания в журнале относительные ("минус поездка"),
+# и повторное применение уже учтённых записей исказило бы баланс.
+# Порядок блокировок: полосы билетов -> __замок_базы -> __замок_очереди.
 class TicketDatabase:
-    def __init__(self, filename="tickets_db.json"):
+    def __init__(self, filename="tickets_db.json", журнал=False, порог_уплотнения=10000, fsync=False,
+                 хранилище_истории=None, потокобезопасно=False, полос_блокировки=64, групповая_запись=False):
         self.__filename = filename
-        self.__билеты = []
+        self.__бинарный = filename.endswith(".bin")
+        self.__журнал = журнал
+        self.__файл_журнала = filename + ".journal"
+        self.__порог_уплотнения = порог_уплотнения
+        self.__fsync = fsync
+        self.__записей_в_журнале = 0
+        self.__журнал_f = None
+        self.__хранилище = ХранилищеИстории(хранилище_истории) if хранилище_истории else None
+        # Первичный индекс: номер -> билет (dict сохраняет порядок добавления)
+        self.__билеты = {}
+        self.__замок_базы = threading.RLock()
+        self.__замок_записи = threading.Lock()
+        self.__замок_очереди = threading.Lock()
+        self.__полосы = [threading.Lock() for _ in range(полос_блокировки)]
+        self.__lsn = itertools.count(1)
+        self.__lsn_снимка = 0
+        self.__событий_снимка = 0
+        # Индекс сроков: отсортированный список (срок_действия, номер) билетов с ограничением
+        # по сроку; строится одной сортировкой после загрузки и далее поддерживается вставками
+        self.__сроки = None
+        # Отложенные записи журнала / признак несохранённого снимка для фонового потока
+        self.__очередь = []
+        self.__грязно = False
         self.__load()
+        # Новые записи нумеруются после LSN прочитанного снимка, иначе база, сохранённая
+        # без журнала и открытая с журналом, выдаст номера не больше LSN снимка,
+        # и при воспроизведении такие записи будут пропущены
+        self.__lsn = itertools.count(max(self.__lsn_снимка + 1, next(self.__lsn)))
+        if self.__журнал:
+            self.__воспроизвести_журнал()
+        self.__сроки = sorted((б.срок_действия, б.номер) for б in self.__билеты.values()
+                              if isinstance(б, БилетОрганичением))
+        self.__писатель = None
+        self.__отложенно = групповая_запись or потокобезопасно
+        if потокобезопасно:
+            self.__есть_работа = threading.Event()
+            self.__остановить = False
+            self.__писатель = threading.Thread(target=self.__цикл_записи, name="TicketDatabase-writer", daemon=True)
+            self.__писатель.start()
 
     @property
     def билеты(self):
-        return self.__билеты
+        return list(self.__билеты.values())
 
     def __load(self):
         if os.path.exists(self.__filename):
             try:
-                with open(self.__filename, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                for item in data:
-                    if item["тип"] == "ПроезднойБилет":
-                        билет = ПроезднойБилет.from_dict(item)
-                    elif item["тип"] == "БилетОрганичением":
-                        билет = БилетОрганичением.from_dict(item)
-                    elif item["тип"] == "БилетОрганичениемПоездок":
-                        билет = БилетОрганичениемПоездок.from_dict(item)
-                    else:
+                for item in self.__читать_снимок():
+                    if item["тип"] == МЕТКА_СНИМКА:
+                        self.__lsn_снимка = item["lsn"]
+                        self.__событий_снимка = item.get("событий", 0)
                         continue
-                    self.__билеты.append(билет)
-                print(f"База данных загружена из {self.__filename}")
+                    билет = self.__билет_из_словаря(item)
+                    if билет is None:
+                        continue
+                    self.__вставить(билет)
+                if _приёмник.активен:
+                    _приёмник.событие("база_загружена", файл=self.__filename)
             except Exception as e:
-                print(f"Ошибка загрузки базы данных: {e}")
-                self.__билеты = []
+                if _приёмник.активен:
+                    _приёмник.событие("ошибка_загрузки", ошибка=e)
+                self.__билеты = {}
         else:
             self.__save()
-            print(f"Создана новая база данных: {self.__filename}")
+            if _приёмник.активен:
+                _приёмник.событие("база_создана", файл=self.__filename)
+
+    def __читать_снимок(self):
+        if self.__бинарный:
+            yield from читать_бинарный(self.__filename)
+            return
+        with open(self.__filename, "r", encoding="utf-8") as f:
+            yield from читать_json_массив(f)
+
+    @staticmethod
+    def __билет_из_словаря(item):
+        cls = РЕЕСТР_ТИПОВ.get(item["тип"])
+        return cls.from_dict(item) if cls else None
+
+    def __замок(self, номер):
+        return self.__полосы[hash(номер) % len(self.__полосы)]
+
+    def __снять_снимок(self):
+        # Согласованный срез: под всеми блокировками ни одно изменение не выполняется
+        # наполовину, поэтому все записи с LSN меньше взятого уже отражены в словарях.
+        # Такие записи из очереди больше не нужны — они войдут в снимок.
+        for полоса in self.__полосы:
+            полоса.acquire()
+        try:
+            with self.__замок_базы, self.__замок_очереди:
+                lsn = next(self.__lsn)
+                событий = len(self.__хранилище) if self.__хранилище is not None else 0
+                словари = [{"тип": МЕТКА_СНИМКА, "lsn": lsn, "событий": событий}]
+                словари.extend(билет.to_dict() for билет in self.__билеты.values())
+                if self.__очередь:
+                    self.__очередь = [з for з in self.__очередь if з["lsn"] > lsn]
+        finally:
+            for полоса in self.__полосы:
+                полоса.release()
+        return словари
+
+    def __записать_снимок(self, indent=None):
+        # Атомарная запись: временный файл + os.replace, чтобы сбой не оставил полфайла
+        tmp = self.__filename + ".tmp"
+        словари = self.__снять_снимок()
+        if self.__хранилище is not None:
+            # События, учтённые снимком, попадают на диск раньше самого снимка
+            self.__хранилище.сбросить(fsync=self.__fsync)
+        if self.__бинарный:
+            записать_бинарный(tmp, словари)
+        else:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(словари, f, ensure_ascii=False, indent=indent)
+        if self.__fsync:
+            with open(tmp, "rb") as f:
+                os.fsync(f.fileno())
+        os.replace(tmp, self.__filename)
+        if self.__fsync:
+            # Переименование долговечно, только когда на диск попала и сама папка
+            _fsync_папки(self.__filename)
 
     def __save(self):
-        with open(self.__filename, "w", encoding="utf-8") as f:
-            json.dump([билет.to_dict() for билет in self.__билеты], f, ensure_ascii=False, indent=4)
-        print(f"База данных сохранена в {self.__filename}")
+        self.__записать_снимок(indent=4)
+        if _приёмник.активен:
+            _приёмник.событие("база_сохранена", файл=self.__filename)
+
+    def __воспроизвести_журнал(self):
+        if not os.path.exists(self.__файл_журнала):
+            return
+        применено = 0
+        целая_длина = 0
+        последний_lsn = self.__lsn_снимка
+        if self.__хранилище is not None:
+            self.__хранилище.начать_воспроизведение(self.__событий_снимка)
+        with open(self.__файл_журнала, "rb") as f:
+            for строка in f:
+                try:
+                    запись = json.loads(строка)
+                except ValueError:
+                    # Оборванная последняя запись после сбоя — отбрасываем её
+                    break
+                if not строка.endswith(b"\n"):
+                    break
+                целая_длина += len(строка)
+                # Записи без LSN — из журналов старого формата, их снимок не учитывает
+                lsn = запись.get("lsn")
+                if lsn is not None and lsn <= self.__lsn_снимка:
+                    continue
+                self.__применить(запись)
+                последний_lsn = max(последний_lsn, lsn or 0)
+                применено += 1
+        if self.__хранилище is not None:
+            self.__хранилище.закончить_воспроизведение()
+        if целая_длина < os.path.getsize(self.__файл_журнала):
+            with open(self.__файл_журнала, "r+b") as f:
+                f.truncate(целая_длина)
+        self.__записей_в_журнале = применено
+        self.__lsn = itertools.count(последний_lsn + 1)
+        if _приёмник.активен:
+            _приёмник.событие("журнал_воспроизведён", файл=self.__файл_журнала, записей=применено)
+
+    def __применить(self, запись):
+        if запись["оп"] == "добавить":
+            билет = self.__билет_из_словаря(запись["билет"])
+            if билет is not None:
+                self.__вставить(билет)
+        elif запись["оп"] == "удалить":
+            self.__убрать_из_индекса(self.__билеты.pop(запись["номер"], None))
+        elif запись["оп"] == "списать":
+            билет = self.__билеты.get(запись["номер"])
+            if билет is not None:
+                билет._списать(в_дату(запись["время"]))
+
+    def __вставить(self, билет):
+        # Замена переносит билет в конец, как и прежде. Возвращает LSN изменения;
+        # хранилище подключается под той же блокировкой, чтобы снимок не застал билет
+        # вставленным, но с историей ещё в памяти
+        with self.__замок_базы:
+            self.__убрать_из_индекса(self.__билеты.pop(билет.номер, None))
+            self.__билеты[билет.номер] = билет
+            if self.__сроки is not None and isinstance(билет, БилетОрганичением):
+                bisect.insort(self.__сроки, (билет.срок_действия, билет.номер))
+            if self.__хранилище is not None:
+                билет._подключить_хранилище(self.__хранилище)
+            return next(self.__lsn)
+
+    def __убрать_из_индекса(self, билет):
+        if self.__сроки is None or not isinstance(билет, БилетОрганичением):
+            return
+        ключ = (билет.срок_действия, билет.номер)
+        i = bisect.bisect_left(self.__сроки, ключ)
+        if i < len(self.__сроки) and self.__сроки[i] == ключ:
+            del self.__сроки[i]
+
+    def __дописать(self, записи):
+        if self.__журнал_f is None:
+            self.__журнал_f = open(self.__файл_журнала, "a", encoding="utf-8")
+        self.__журнал_f.write("".join(json.dumps(з, ensure_ascii=False) + "\n" for з in записи))
+        self.__журнал_f.flush()
+        if self.__fsync:
+            os.fsync(self.__журнал_f.fileno())
+        self.__записей_в_журнале += len(записи)
+        if self.__записей_в_журнале >= self.__порог_уплотнения:
+            self.__уплотнить()
+
+    def уплотнить(self):
+        with self.__замок_записи:
+            self.__уплотнить()
+
+    def __уплотнить(self):
+        # Снимок пишется атомарно и только потом журнал обнуляется. Если сбой случится
+        # между этими шагами, записи старого журнала с LSN не больше LSN снимка
+        # при воспроизведении пропускаются. Вызывается под __замок_записи, поэтому
+        # новые записи за это время только копятся в очереди
+        self.__записать_снимок()
+        if self.__журнал_f is not None:
+            self.__журнал_f.close()
+            self.__журнал_f = None
+        with open(self.__файл_журнала, "w") as f:
+            if self.__fsync:
+                os.fsync(f.fileno())
+        self.__записей_в_журнале = 0
+
+    @property
+    def хранилище_истории(self):
+        return self.__хранилище
+
+    def __зафиксировать(self, записи):
+        # Записи журнала нужны только в режиме журнала; в режиме снимка важен сам факт изменения
+        if self.__отложенно:
+            self.__в_очередь(записи)
+        elif self.__журнал:
+            with self.__замок_записи:
+                self.__дописать(записи)
+        else:
+            with self.__замок_записи:
+                self.__save()
+
+    def __в_очередь(self, записи):
+        with self.__замок_очереди:
+            if self.__журнал:
+                self.__очередь.extend(записи)
+            else:
+                self.__грязно = True
+        if self.__писатель is not None:
+            self.__есть_работа.set()
+
+    def сохранить(self):
+        # Немедленно записать всё, что накопилось в режиме групповой записи
+        with self.__замок_записи:
+            with self.__замок_очереди:
+                записи, self.__очередь = self.__очередь, []
+                грязно, self.__грязно = self.__грязно, False
+            if записи:
+                self.__дописать(записи)
+            elif грязно:
+                self.__save()
+
+    def __цикл_записи(self):
+        # Пока идёт запись, новые запросы копятся и уходят следующим одним сохранением.
+        # Признак остановки читается до сохранения: если он появился во время записи,
+        # цикл сделает ещё один проход и сохранит накопившееся
+        while True:
+            self.__есть_работа.wait()
+            self.__есть_работа.clear()
+            остановить = self.__остановить
+            self.сохранить()
+            if остановить:
+                return
+
+    def закрыть(self):
+        if self.__писатель is not None:
+            self.__остановить = True
+            self.__есть_работа.set()
+            self.__писатель.join()
+            self.__писатель = None
+        if self.__отложенно:
+            self.сохранить()
+        if self.__журнал_f is not None:
+            self.__журнал_f.close()
+            self.__журнал_f = None
+        if self.__хранилище is not None:
+            self.__хранилище.закрыть()
 
     def добавить_билет(self, билет):
-        # Проверяем, есть ли билет с таким номером
-        for b in self.__билеты:
-            if b.номер == билет.номер:
-                self.__билеты.remove(b)
-                break
-        self.__билеты.append(билет)
-        self.__save()
-        print(f"Билет №{билет.номер} добавлен в базу данных")
+        # Под блокировкой билета: касание не попадёт ни между вставкой и to_dict,
+        # ни в очередь раньше записи о добавлении
+        with self.__замок(билет.номер):
+            lsn = self.__вставить(билет)
+            записи = [{"оп": "добавить", "lsn": lsn, "билет": билет.to_dict()}] if self.__журнал else []
+            if self.__отложенно:
+                self.__в_очередь(записи)
+        if not self.__отложенно:
+            self.__зафиксировать(записи)
+        if _приёмник.активен:
+            _приёмник.событие("билет_добавлен", номер=билет.номер)
 
     def удалить_билет(self, номер):
-        билет = self.найти_билет(номер)
+        # Как и добавление, под блокировкой билета: запись об удалении встаёт в очередь
+        # раньше записи о повторном добавлении того же номера
+        with self.__замок(номер):
+            with self.__замок_базы:
+                билет = self.__билеты.pop(номер, None)
+                self.__убрать_из_индекса(билет)
+                записи = [{"оп": "удалить", "lsn": next(self.__lsn), "номер": номер}]
+            if билет and self.__отложенно:
+                self.__в_очередь(записи)
         if билет:
-            self.__билеты.remove(билет)
-            self.__save()
-            print(f"Билет №{номер} удалён из базы данных")
-        else:
-            print(f"Билет №{номер} не найден")
+            if not self.__отложенно:
+                self.__зафиксировать(записи)
+            if _приёмник.активен:
+                _приёмник.событие("билет_удалён", номер=номер)
+        elif _приёмник.активен:
+            _приёмник.событие("билет_не_найден", номер=номер)
+
+    def списать_пакет(self, taps):
+        # taps: пары (номер, время). Все списания выполняются в памяти,
+        # затем пакет сохраняется одной записью; вывода на каждое касание нет.
+        # В журнал пишется само касание ("списать"), а не весь билет с историей.
+        результаты = []
+        записи = []
+        изменено = False
+        фоновая_запись = self.__отложенно
+        получить = self.__билеты.get
+        for номер, время in taps:
+            with self.__замок(номер):
+                # Билет ищется под блокировкой: иначе касание могло бы попасть в объект,
+                # который добавление того же номера уже заменило
+                билет = получить(номер)
+                if билет is None:
+                    результаты.append(None)
+                    continue
+                успех = билет._списать(время)
+                if успех:
+                    изменено = True
+                    запись = ([{"оп": "списать", "lsn": next(self.__lsn), "номер": номер, "время": время.isoformat()}]
+                              if self.__журнал else [])
+                    if фоновая_запись:
+                        # Ставим в очередь под блокировкой билета, чтобы порядок касаний сохранился
+                        self.__в_очередь(запись)
+                    else:
+                        записи.extend(запись)
+            результаты.append(успех)
+        if изменено and not фоновая_запись:
+            self.__зафиксировать(записи)
+        return результаты
+
+    def списать(self, номер, время=None):
+        # Одиночное касание турникета; безопасно вызывать из нескольких потоков
+        return self.списать_пакет([(номер, время or datetime.now())])[0]
+
+    def истекают_в_течение(self, часов, момент=None):
+        # Билеты, срок которых закончится в ближайшие часов часов: O(log n + k) по индексу
+        момент = момент or datetime.now()
+        with self.__замок_базы:
+            начало = bisect.bisect_left(self.__сроки, (момент,))
+            конец = bisect.bisect_left(self.__сроки, (момент + timedelta(hours=часов) + МИКРОСЕКУНДА,))
+            return [self.__билеты[номер] for _, номер in self.__сроки[начало:конец]]
+
+    def удалить_истёкшие(self, момент=None):
+        # Истёкшие билеты лежат в начале индекса, поэтому удаляется его префикс
+        # Номера заранее неизвестны, поэтому берутся блокировки всех билетов, как для снимка
+        момент = момент or datetime.now()
+        for полоса in self.__полосы:
+            полоса.acquire()
+        try:
+            with self.__замок_базы:
+                граница = bisect.bisect_left(self.__сроки, (момент,))
+                номера = [номер for _, номер in self.__сроки[:граница]]
+                del self.__сроки[:граница]
+                for номер in номера:
+                    del self.__билеты[номер]
+                записи = [{"оп": "удалить", "lsn": next(self.__lsn), "номер": номер} for номер in номера]
+            if номера and self.__отложенно:
+                self.__в_очередь(записи)
+        finally:
+            for полоса in self.__полосы:
+                полоса.release()
+        if номера and not self.__отложенно:
+            self.__зафиксировать(записи)
+        return номера
 
     def найти_билет(self, номер):
-        for билет in self.__билеты:
-            if билет.номер == номер:
-                return билет
-        return None
+        return self.__билеты.get(номер)
+
+    def найти_билеты(self, номера):
+        # Пакетный поиск для шлюзов турникетов: один вызов на пачку номеров
+        получить = self.__билеты.get
+        return [получить(номер) for номер in номера]
 
     def __str__(self):
-        return f"База данных билетов ({len(self.__билеты)} билетов):\n" + "\n".join(str(б) for б in self.__билеты)
\ No newline at end of file
+        return f"База данных билетов ({len(self.__билеты)} билетов):\n" + "\n".join(str(б) for б in self.__билеты.values())
\ No newline at end of file
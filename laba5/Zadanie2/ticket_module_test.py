@@ -0,0 +1,246 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta
+
+from ticket_module import (
+    TicketDatabase, БилетОрганичениемПоездок, ПроезднойБилет, ХранилищеИстории,
+    МЕТКА_СНИМКА, записать_бинарный, читать_бинарный,
+)
+
+НАЧАЛО = datetime(2025, 1, 1, 8, 0)
+
+
+def касания(номер, количество, сдвиг=0):
+    return [(номер, НАЧАЛО + timedelta(minutes=сдвиг + i)) for i in range(количество)]
+
+
+class ЗамокСДействием:
+    """Блокировка, которая перед первым захватом выполняет действие"""
+    def __init__(self, действие):
+        self.__замок = threading.Lock()
+        self.__действие = действие
+
+    def acquire(self):
+        действие, self.__действие = self.__действие, None
+        if действие is not None:
+            действие()
+        self.__замок.acquire()
+
+    def release(self):
+        self.__замок.release()
+
+    def __enter__(self):
+        self.acquire()
+
+    def __exit__(self, *исключение):
+        self.release()
+
+
+class TestTicketDatabaseJournal(unittest.TestCase):
+    def setUp(self):
+        """Каждый тест работает в своей временной папке"""
+        self.папка = tempfile.mkdtemp()
+        self.база = os.path.join(self.папка, "db.json")
+        self.история = os.path.join(self.папка, "история")
+
+    def tearDown(self):
+        shutil.rmtree(self.папка, ignore_errors=True)
+
+    def открыть(self, **параметры):
+        параметры.setdefault("журнал", True)
+        return TicketDatabase(self.база, **параметры)
+
+    def test_crash_between_snapshot_and_truncate(self):
+        """Проверяем, что журнал, не обнулённый после снимка, не списывает поездки повторно"""
+        db = self.открыть(хранилище_истории=self.история)
+        db.добавить_билет(БилетОрганичениемПоездок("1", 10))
+        db.списать_пакет(касания("1", 3))
+        журнал = self.база + ".journal"
+        shutil.copy(журнал, журнал + ".копия")
+        db.уплотнить()
+        db.закрыть()
+        # Сбой до обнуления журнала: старый журнал остался рядом с новым снимком
+        os.replace(журнал + ".копия", журнал)
+
+        db = self.открыть(хранилище_истории=self.история)
+        билет = db.билеты[0]
+        self.assertEqual(билет.количество_поездок, 7)
+        self.assertEqual(len(билет.история), 3)
+        db.закрыть()
+
+    def test_replay_does_not_duplicate_store_events(self):
+        """Проверяем, что события, уже записанные в хранилище, при воспроизведении не дублируются"""
+        db = self.открыть(хранилище_истории=self.история, порог_уплотнения=4)
+        db.добавить_билет(БилетОрганичениемПоездок("1", 20))
+        for время in касания("1", 9):
+            db.списать_пакет([время])
+        db.закрыть()
+
+        for _ in range(2):
+            db = self.открыть(хранилище_истории=self.история)
+            билет = db.билеты[0]
+            self.assertEqual(билет.количество_поездок, 11)
+            self.assertEqual(len(билет.история), 9)
+            self.assertEqual(len(db.хранилище_истории), 9)
+            db.закрыть()
+
+    def test_torn_journal_record_is_truncated(self):
+        """Проверяем, что оборванная последняя запись журнала отбрасывается"""
+        db = self.открыть()
+        db.добавить_билет(БилетОрганичениемПоездок("1", 10))
+        db.списать_пакет(касания("1", 2))
+        db.закрыть()
+        журнал = self.база + ".journal"
+        целый = os.path.getsize(журнал)
+        with open(журнал, "a", encoding="utf-8") as f:
+            f.write('{"оп": "списать", "lsn": 99, "номер": "1"')
+
+        db = self.открыть()
+        self.assertEqual(db.билеты[0].количество_поездок, 8)
+        self.assertEqual(os.path.getsize(журнал), целый)
+        db.закрыть()
+
+    def test_group_commit_memory_matches_disk(self):
+        """Проверяем, что после групповой записи и уплотнений база на диске совпадает с памятью"""
+        db = self.открыть(групповая_запись=True, порог_уплотнения=5)
+        for i in range(10):
+            db.добавить_билет(БилетОрганичениемПоездок(str(i), 50))
+        for i in range(10):
+            db.списать_пакет(касания(str(i), 7, сдвиг=i))
+            db.сохранить()
+        в_памяти = {б.номер: б.количество_поездок for б in db.билеты}
+        db.закрыть()
+
+        db = self.открыть()
+        self.assertEqual({б.номер: б.количество_поездок for б in db.билеты}, в_памяти)
+        db.закрыть()
+
+    def test_concurrent_taps_survive_close(self):
+        """Проверяем, что касания из нескольких потоков, пришедшие во время записи и закрытия, не теряются"""
+        db = self.открыть(потокобезопасно=True, порог_уплотнения=50)
+        for i in range(8):
+            db.добавить_билет(БилетОрганичениемПоездок(str(i), 1000))
+
+        def касаться(номер):
+            for время in касания(номер, 100):
+                db.списать_пакет([время])
+
+        потоки = [threading.Thread(target=касаться, args=(str(i),)) for i in range(8)]
+        for поток in потоки:
+            поток.start()
+        for поток in потоки:
+            поток.join()
+        в_памяти = {б.номер: б.количество_поездок for б in db.билеты}
+        db.закрыть()
+
+        self.assertEqual(set(в_памяти.values()), {900})
+        db = self.открыть()
+        self.assertEqual({б.номер: б.количество_поездок for б in db.билеты}, в_памяти)
+        db.закрыть()
+
+    def test_tap_after_concurrent_replace_hits_new_ticket(self):
+        """Проверяем, что касание, ждавшее блокировку во время замены билета, списывается с нового билета"""
+        db = self.открыть()
+        db.добавить_билет(БилетОрганичениемПоездок("1", 10))
+        новый = БилетОрганичениемПоездок("1", 5)
+
+        def заменить():
+            поток = threading.Thread(target=db.добавить_билет, args=(новый,))
+            поток.start()
+            поток.join()
+
+        # Замена выполняется в другом потоке непосредственно перед захватом блокировки касанием
+        db._TicketDatabase__полосы = [ЗамокСДействием(заменить)]
+        self.assertEqual(db.списать_пакет(касания("1", 1)), [True])
+        self.assertEqual(новый.количество_поездок, 4)
+        db.закрыть()
+
+        db = self.открыть()
+        self.assertEqual(db.найти_билет("1").количество_поездок, 4)
+        db.закрыть()
+
+    def test_delete_and_readd_keep_order_in_queue(self):
+        """Проверяем, что удаление и повторное добавление номера воспроизводятся в исходном порядке"""
+        db = self.открыть(групповая_запись=True)
+        db.добавить_билет(БилетОрганичениемПоездок("1", 10))
+        db.удалить_билет("1")
+        db.добавить_билет(БилетОрганичениемПоездок("1", 3))
+        db.закрыть()
+
+        db = self.открыть()
+        self.assertEqual(db.найти_билет("1").количество_поездок, 3)
+        db.закрыть()
+
+    def test_snapshot_mode_database_reopened_with_journal(self):
+        """Проверяем, что база, сохранённая без журнала, после перехода на журнал не теряет записи"""
+        db = self.открыть(журнал=False)
+        for i in range(20):
+            db.добавить_билет(БилетОрганичениемПоездок(str(i), 10))
+        db.закрыть()
+
+        db = self.открыть()
+        db.списать_пакет(касания("0", 2))
+        db.добавить_билет(БилетОрганичениемПоездок("новый", 5))
+        db.закрыть()
+
+        db = self.открыть()
+        self.assertEqual(db.найти_билет("0").количество_поездок, 8)
+        self.assertIsNotNone(db.найти_билет("новый"))
+        db.закрыть()
+
+    def test_snapshot_without_journal_reopens(self):
+        """Проверяем, что база без журнала сохраняется снимком и читается обратно"""
+        db = self.открыть(журнал=False)
+        db.добавить_билет(ПроезднойБилет("п"))
+        db.удалить_билет("п")
+        db.добавить_билет(БилетОрганичениемПоездок("1", 3))
+        db.закрыть()
+
+        db = self.открыть(журнал=False)
+        self.assertEqual([б.номер for б in db.билеты], ["1"])
+        db.закрыть()
+
+
+class TestBinarySnapshot(unittest.TestCase):
+    def test_round_trip_keeps_marker(self):
+        """Проверяем, что бинарный снимок сохраняет метку снимка и билеты"""
+        билет = БилетОрганичениемПоездок("42", 5)
+        билет._списать(НАЧАЛО)
+        метка = {"тип": МЕТКА_СНИМКА, "lsn": 17, "событий": 3}
+        with tempfile.TemporaryDirectory() as папка:
+            путь = os.path.join(папка, "db.bin")
+            записать_бинарный(путь, [метка, билет.to_dict()])
+            прочитано = list(читать_бинарный(путь))
+        self.assertEqual(прочитано[0], метка)
+        self.assertEqual(len(прочитано), 2)
+        self.assertEqual(прочитано[1]["номер"], "42")
+        self.assertEqual(прочитано[1]["количество_поездок"], 4)
+        self.assertEqual(len(прочитано[1]["история"]), 1)
+
+
+class TestHistoryStore(unittest.TestCase):
+    def test_misaligned_columns_are_reconciled(self):
+        """Проверяем, что столбцы разной длины после сбоя обрезаются до самого короткого"""
+        with tempfile.TemporaryDirectory() as папка:
+            хранилище = ХранилищеИстории(папка)
+            for i in range(3):
+                хранилище.добавить("1", "поездка", НАЧАЛО + timedelta(minutes=i))
+            хранилище.закрыть()
+            with open(os.path.join(папка, "время.q"), "ab") as f:
+                f.write(b"\0" * 16)
+            with open(os.path.join(папка, "коды.H"), "ab") as f:
+                f.write(b"\0" * 3)
+
+            хранилище = ХранилищеИстории(папка)
+            self.assertEqual(len(хранилище), 3)
+            self.assertEqual([len(столбец) for столбец in хранилище.столбцы()], [3, 3, 3])
+            хранилище.добавить("1", "поездка", НАЧАЛО + timedelta(minutes=3))
+            self.assertEqual(хранилище.действие(3).время, НАЧАЛО + timedelta(minutes=3))
+            хранилище.закрыть()
+
+
+if __name__ == "__main__":
+    unittest.main()